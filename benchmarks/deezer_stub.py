@@ -0,0 +1,140 @@
+"""
+Local stand-in for the Deezer API, for load tests.
+
+Serves ``/search`` and ``/infos`` with configurable latency, jitter, a slow
+tail, error rate and payload size, and counts the calls it receives at
+``/stats``.
+
+Usage:
+    python benchmarks/deezer_stub.py --port 8900 --latency 0.08 --jitter 0.03 --error-rate 0.01
+
+Point the application at it with ``DEEZER_API_URL=http://127.0.0.1:8900``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, Query, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def create_app(
+    latency: float, jitter: float, error_rate: float, total: int, padding: int,
+    slow_rate: float = 0.0, slow_latency: float = 0.0
+) -> FastAPI:
+    """
+    Build the stub application.
+
+    Args:
+        latency: Mean response delay in seconds
+        jitter: Standard deviation of the delay in seconds
+        error_rate: Fraction of searches answered with 500
+        total: Number of results each query reports
+        padding: Extra bytes of filler per track, to tune payload size
+        slow_rate: Fraction of searches delayed by ``slow_latency`` instead, to model a long tail
+        slow_latency: Delay of slow searches in seconds
+    """
+    app = FastAPI()
+    calls = {"search": 0, "infos": 0, "errors": 0}
+    filler = "x" * padding
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value) if orjson is not None else json.dumps(value).encode("utf-8")
+
+    def track(q: str, position: int) -> dict:
+        track_id = zlib.crc32(f"{q}:{position}".encode("utf-8"))
+        artist_id = track_id % 100000
+        return {
+            "id": track_id,
+            "readable": True,
+            "title": f"{q} track {position}",
+            "title_short": f"{q} track {position}",
+            "link": f"https://www.deezer.com/track/{track_id}",
+            "duration": 180 + position % 120,
+            "rank": 1000000 - position,
+            "explicit_lyrics": False,
+            "preview": f"https://cdns-preview-0.dzcdn.net/stream/{track_id}.mp3",
+            "md5_image": "0" * 32,
+            "artist": {
+                "id": artist_id,
+                "name": f"{q} artist {position % 7}",
+                "link": f"https://www.deezer.com/artist/{artist_id}",
+                "picture": f"https://api.deezer.com/artist/{artist_id}/image",
+                "picture_small": f"https://e-cdns-images.dzcdn.net/images/artist/{artist_id}/56x56.jpg",
+                "picture_medium": f"https://e-cdns-images.dzcdn.net/images/artist/{artist_id}/250x250.jpg",
+                "picture_big": f"https://e-cdns-images.dzcdn.net/images/artist/{artist_id}/500x500.jpg",
+                "picture_xl": f"https://e-cdns-images.dzcdn.net/images/artist/{artist_id}/1000x1000.jpg",
+                "tracklist": f"https://api.deezer.com/artist/{artist_id}/top?limit=50",
+                "type": "artist",
+            },
+            "album": {
+                "id": track_id % 1000000,
+                "title": f"{q} album {position % 3}",
+                "cover": f"https://api.deezer.com/album/{track_id}/image",
+                "cover_small": f"https://e-cdns-images.dzcdn.net/images/cover/{track_id}/56x56.jpg",
+                "cover_medium": f"https://e-cdns-images.dzcdn.net/images/cover/{track_id}/250x250.jpg",
+                "cover_big": f"https://e-cdns-images.dzcdn.net/images/cover/{track_id}/500x500.jpg",
+                "cover_xl": f"https://e-cdns-images.dzcdn.net/images/cover/{track_id}/1000x1000.jpg",
+                "tracklist": f"https://api.deezer.com/album/{track_id}/tracks",
+                "type": "album",
+            },
+            "type": "track",
+            "filler": filler,
+        }
+
+    @app.get("/search")
+    async def search(q: str = Query(""), index: int = Query(0), limit: int = Query(25)):
+        calls["search"] += 1
+        if random.random() < slow_rate:
+            await asyncio.sleep(slow_latency)
+        else:
+            await asyncio.sleep(max(random.gauss(latency, jitter), 0.0))
+        if random.random() < error_rate:
+            calls["errors"] += 1
+            return Response(status_code=500, content=b'{"error":"stub failure"}', media_type="application/json")
+        positions = range(index, min(index + limit, total))
+        payload = {"data": [track(q, position) for position in positions], "total": total}
+        if index + limit < total:
+            payload["next"] = f"https://api.deezer.com/search?q={q}&index={index + limit}"
+        return Response(content=dumps(payload), media_type="application/json")
+
+    @app.get("/infos")
+    async def infos():
+        calls["infos"] += 1
+        return {"country_iso": "DE", "open": True}
+
+    @app.get("/stats")
+    async def stats():
+        return calls
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.08, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.03, help="standard deviation of the delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of searches answered with 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of searches that take --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="delay of slow searches in seconds")
+    parser.add_argument("--total", type=int, default=300, help="number of results each query reports")
+    parser.add_argument("--padding", type=int, default=0, help="extra filler bytes per track")
+    args = parser.parse_args()
+
+    app = create_app(
+        args.latency, args.jitter, args.error_rate, args.total, args.padding, args.slow_rate, args.slow_latency
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Load test: throughput and latency of the app against a local Deezer stand-in.
+
+Starts ``deezer_stub.py`` and the application (``uvicorn main:app``) as
+subprocesses, then drives ``GET /``, ``/api/search`` and ``/health`` at
+several concurrency levels. Search queries follow a Zipf or uniform
+distribution. For each run it reports requests per second, p50/p95/p99
+latency, errors and the number of calls that reached the stub, and writes
+everything to a JSON file so runs can be compared across commits.
+
+Usage:
+    python benchmarks/loadtest.py --output bench.json
+    python benchmarks/loadtest.py --baseline bench.json --output new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("root", "search", "health")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[position]
+
+
+class QueryGenerator:
+    """Draws search queries from a Zipf or uniform distribution over a fixed vocabulary."""
+
+    def __init__(self, distribution, vocabulary, zipf_s, seed):
+        self.rng = random.Random(seed)
+        self.population = ["artist %d" % i for i in range(vocabulary)]
+        if distribution == "zipf":
+            total = 0.0
+            self.cum_weights = []
+            for rank in range(1, vocabulary + 1):
+                total += 1.0 / rank ** zipf_s
+                self.cum_weights.append(total)
+        else:
+            self.cum_weights = None
+
+    def next(self):
+        if self.cum_weights is None:
+            return self.rng.choice(self.population)
+        return self.rng.choices(self.population, cum_weights=self.cum_weights)[0]
+
+
+async def wait_ready(url, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.RequestError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+async def stub_calls(stub_url):
+    async with httpx.AsyncClient() as client:
+        return (await client.get(stub_url + "/stats")).json()["search"]
+
+
+async def run_load(app_url, scenario, concurrency, duration, queries):
+    """Run closed-loop load for ``duration`` seconds and return per-request latencies and error count."""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    deadline = time.monotonic() + duration
+
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                if scenario == "root":
+                    request = client.get("/")
+                elif scenario == "search":
+                    request = client.get("/api/search", params={"q": queries.next()})
+                else:
+                    request = client.get("/health")
+                started = time.perf_counter()
+                try:
+                    response = await request
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.RequestError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def benchmark(args, app_url, stub_url):
+    results = []
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            queries = QueryGenerator(args.distribution, args.vocabulary, args.zipf, seed=concurrency)
+            before = await stub_calls(stub_url)
+            started = time.perf_counter()
+            latencies, errors = await run_load(app_url, scenario, concurrency, args.duration, queries)
+            elapsed = time.perf_counter() - started
+            upstream = await stub_calls(stub_url) - before
+            latencies.sort()
+            result = {
+                "scenario": scenario,
+                "concurrency": concurrency,
+                "requests": len(latencies),
+                "errors": errors,
+                "rps": len(latencies) / elapsed,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "upstream_calls": upstream,
+            }
+            results.append(result)
+            print(
+                f"{scenario:>7} c={concurrency:<4} {result['rps']:>9.1f} rps  "
+                f"p50={result['p50_ms']:7.2f}ms p95={result['p95_ms']:7.2f}ms p99={result['p99_ms']:7.2f}ms  "
+                f"errors={errors} upstream={upstream}"
+            )
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Print changes against a baseline file and return True if any run regressed beyond ``tolerance``."""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressed = False
+    print(f"\nCompared to {baseline_path}:")
+    for result in results:
+        old = baseline.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        rps_change = result["rps"] / old["rps"] - 1 if old["rps"] else 0.0
+        p99_change = result["p99_ms"] / old["p99_ms"] - 1 if old["p99_ms"] else 0.0
+        flag = ""
+        if rps_change < -tolerance or p99_change > tolerance:
+            regressed = True
+            flag = "  REGRESSION"
+        print(
+            f"{result['scenario']:>7} c={result['concurrency']:<4} "
+            f"rps {rps_change * 100:+6.1f}%  p99 {p99_change * 100:+6.1f}%{flag}"
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--distribution", choices=("zipf", "uniform"), default="zipf")
+    parser.add_argument("--vocabulary", type=int, default=2000, help="number of distinct queries")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--latency", type=float, default=0.08, help="stub mean latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.03, help="stub latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub error rate")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of stub searches that are slow")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="stub delay of slow searches in seconds")
+    parser.add_argument("--padding", type=int, default=0, help="stub filler bytes per track")
+    parser.add_argument("--output", default="loadtest-results.json", help="machine-readable results file")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+    tmp = tempfile.mkdtemp(prefix="musicapp-bench-")
+    env = dict(
+        os.environ,
+        DEEZER_API_URL=stub_url,
+        SHARED_CACHE_PATH=os.path.join(tmp, "search-cache.sqlite3"),
+        UPSTREAM_RATE_LIMIT=os.environ.get("UPSTREAM_RATE_LIMIT", "100000"),
+        UPSTREAM_BURST=os.environ.get("UPSTREAM_BURST", "100000"),
+    )
+
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "benchmarks", "deezer_stub.py"),
+        "--port", str(stub_port), "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--padding", str(args.padding),
+        "--slow-rate", str(args.slow_rate), "--slow-latency", str(args.slow_latency),
+    ])
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ], cwd=ROOT, env=env)
+    try:
+        asyncio.run(wait_ready(stub_url + "/infos"))
+        asyncio.run(wait_ready(app_url + "/health"))
+        results = asyncio.run(benchmark(args, app_url, stub_url))
+    finally:
+        app.terminate()
+        stub.terminate()
+        app.wait()
+        stub.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Microbenchmark: cost of request and upstream metrics instrumentation.
+
+Measures the raw recording calls, and a full in-process ASGI request to
+``/health`` routed with and without ``MetricsMiddleware``.
+
+Usage:
+    python benchmarks/metrics_overhead.py [--iterations 200000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def bench_calls(iterations):
+    metrics = main.Metrics()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        metrics.observe_request("/api/search", "GET", 200, 0.0123, 2048)
+    request_ns = (time.perf_counter() - started) / iterations * 1e9
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        metrics.observe_upstream("search", "200", 0.0876)
+    upstream_ns = (time.perf_counter() - started) / iterations * 1e9
+    return request_ns, upstream_ns
+
+
+async def bench_asgi(app, iterations):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "app": main.app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    request_ns, upstream_ns = bench_calls(args.iterations)
+    print(f"observe_request:  {request_ns:8.1f} ns/call")
+    print(f"observe_upstream: {upstream_ns:8.1f} ns/call")
+
+    # Alternate the two variants and keep the best run of each to reduce noise
+    requests = max(args.iterations // 20, 1000)
+    plain = instrumented = float("inf")
+    for _ in range(3):
+        plain = min(plain, asyncio.run(bench_asgi(main.app.router, requests)))
+        instrumented = min(instrumented, asyncio.run(bench_asgi(main.MetricsMiddleware(main.app.router), requests)))
+    print(f"GET /health without middleware: {plain:8.2f} us/request")
+    print(f"GET /health with middleware:    {instrumented:8.2f} us/request")
+    print(f"instrumentation overhead:       {instrumented - plain:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,97 @@
+"""
+Benchmark: search cache hit rate with 1, 4 and 8 worker processes.
+
+Each worker replays its share of a Zipf-distributed query stream against the
+same cache layers ``search_music`` uses, once with only the per-process cache
+and once with the shared SQLite store added. A miss counts as one upstream
+Deezer call.
+
+Usage:
+    python benchmarks/shared_cache_hit_rate.py [--requests 40000] [--queries 5000]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def zipf_cum_weights(n, s):
+    total = 0.0
+    weights = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** s
+        weights.append(total)
+    return weights
+
+
+def run_worker(args):
+    worker_id, requests, queries, zipf_s, shared_path, start = args
+    rng = random.Random(worker_id)
+    population = ["query %d" % i for i in range(queries)]
+    weights = zipf_cum_weights(queries, zipf_s)
+    local = main.SearchCache(main.SEARCH_CACHE_MAX_ENTRIES, 300.0, 0.0)
+    shared = main.SharedSearchStore(shared_path, 300.0, 0.0, 1_000_000) if shared_path else None
+
+    while time.time() < start:
+        time.sleep(0.001)
+
+    hits = 0
+    for key in rng.choices(population, cum_weights=weights, k=requests):
+        if local.get(key) is not None:
+            hits += 1
+            continue
+        if shared is not None:
+            found = shared.get(key)
+            if found is not None:
+                local.set(key, found[0], age=found[1])
+                hits += 1
+                continue
+        value = {"data": [{"title": key}]}
+        local.set(key, value)
+        if shared is not None:
+            shared.set(key, value)
+            # A real miss waits ~100 ms for Deezer, long enough for the background write to land
+            shared.flush()
+    if shared is not None:
+        shared.close()
+    return hits
+
+
+def measure(workers, total_requests, queries, zipf_s, shared):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3") if shared else ""
+        start = time.time() + 0.5
+        per_worker = total_requests // workers
+        jobs = [(i, per_worker, queries, zipf_s, path, start) for i in range(workers)]
+        with multiprocessing.Pool(workers) as pool:
+            hits = sum(pool.map(run_worker, jobs))
+    requests = per_worker * workers
+    return hits / requests, requests - hits
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40000, help="total requests across all workers")
+    parser.add_argument("--queries", type=int, default=5000, help="number of distinct queries")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of the query distribution")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'local hit%':>11} {'local misses':>13} {'shared hit%':>12} {'shared misses':>14}")
+    for workers in (1, 4, 8):
+        local_rate, local_misses = measure(workers, args.requests, args.queries, args.zipf, shared=False)
+        shared_rate, shared_misses = measure(workers, args.requests, args.queries, args.zipf, shared=True)
+        print(
+            f"{workers:>8} {local_rate * 100:>10.1f}% {local_misses:>13} "
+            f"{shared_rate * 100:>11.1f}% {shared_misses:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,1241 +1,2202 @@
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, Response, StreamingResponse
+from collections import OrderedDict, deque
+from bisect import bisect_left, insort
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit
+import array
+import asyncio
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
 import httpx
+from pydantic import BaseModel, Field
 
-app = FastAPI(
-    title="Music App API",
-    description="A minimalistic FastAPI application with health endpoint and Deezer music search",
-    version="1.0.0"
+try:
+    import h2  # noqa: F401  (required by httpx for HTTP/2)
+except ImportError:
+    h2 = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; pages are then served gzip or uncompressed
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is used instead
+    orjson = None
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; proxied images are then served at their original size
+    Image = None
+
+DEEZER_API_URL = os.getenv("DEEZER_API_URL", "https://api.deezer.com")
+DEEZER_PAGE_SIZE = 25
+DEEZER_MAX_PAGE_SIZE = 100
+
+# Upstream HTTP client settings (seconds / number of connections)
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "10"))
+UPSTREAM_WRITE_TIMEOUT = float(os.getenv("UPSTREAM_WRITE_TIMEOUT", "5"))
+UPSTREAM_POOL_TIMEOUT = float(os.getenv("UPSTREAM_POOL_TIMEOUT", "2"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "0") == "1"
+UPSTREAM_WARMUP_CONNECTIONS = int(os.getenv("UPSTREAM_WARMUP_CONNECTIONS", "2"))
+
+# Deezer request quota per worker process (requests per second / burst size / queued requests)
+UPSTREAM_RATE_LIMIT = float(os.getenv("UPSTREAM_RATE_LIMIT", "9"))
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "40"))
+UPSTREAM_QUEUE_SIZE = int(os.getenv("UPSTREAM_QUEUE_SIZE", "200"))
+
+# Circuit breaker around Deezer calls (calls / ratio / seconds)
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATIO = float(os.getenv("BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "3"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "15"))
+
+# Hedged Deezer requests: a second request is sent when the first is slower than this percentile of
+# recent latencies, and hedges are limited to a fraction of all requests
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "1") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", "0.05"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "500"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "50"))
+
+# Server-Timing header: fraction of requests sampled, and whether clients may opt in with "X-Server-Timing: 1"
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0"))
+SERVER_TIMING_OPT_IN = os.getenv("SERVER_TIMING_OPT_IN", "0") == "1"
+
+# Readiness checks (seconds / requests / waiting pool requests)
+READY_LAG_INTERVAL = float(os.getenv("READY_LAG_INTERVAL", "0.5"))
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "0.5"))
+READY_MAX_IN_FLIGHT = int(os.getenv("READY_MAX_IN_FLIGHT", "500"))
+READY_MAX_POOL_WAITING = int(os.getenv("READY_MAX_POOL_WAITING", "50"))
+READY_PROBE_INTERVAL = float(os.getenv("READY_PROBE_INTERVAL", "30"))
+READY_REQUIRE_UPSTREAM = os.getenv("READY_REQUIRE_UPSTREAM", "0") == "1"
+
+# Structured access log: "" disables it, "-" writes to stdout, else a file path ("{pid}" is replaced per worker)
+ACCESS_LOG = os.getenv("ACCESS_LOG", "")
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", "0.5"))
+ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", str(100 * 1024 * 1024)))
+ACCESS_LOG_BACKUPS = int(os.getenv("ACCESS_LOG_BACKUPS", "5"))
+
+# Maximum number of pages /api/search/stream fetches concurrently
+SEARCH_STREAM_CONCURRENCY = int(os.getenv("SEARCH_STREAM_CONCURRENCY", "4"))
+SEARCH_STREAM_MAX_PAGES = int(os.getenv("SEARCH_STREAM_MAX_PAGES", "20"))
+
+# Batch search limits (queries / concurrent upstream fetches / seconds)
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_DEADLINE_SECONDS = float(os.getenv("BATCH_DEADLINE_SECONDS", "5"))
+
+# Typeahead index limits (terms / index entries scanned per lookup)
+SUGGEST_MAX_TERMS = int(os.getenv("SUGGEST_MAX_TERMS", "50000"))
+SUGGEST_SCAN_LIMIT = int(os.getenv("SUGGEST_SCAN_LIMIT", "1000"))
+
+# Local track index size (tracks)
+LOCAL_INDEX_MAX_TRACKS = int(os.getenv("LOCAL_INDEX_MAX_TRACKS", "20000"))
+
+# Pre-warming of popular queries (queries / seconds / refreshes per second / fraction of burst)
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "1") == "1"
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "100"))
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "15"))
+PREWARM_LEAD_SECONDS = float(os.getenv("PREWARM_LEAD_SECONDS", "60"))
+PREWARM_RATE = float(os.getenv("PREWARM_RATE", "2"))
+PREWARM_MIN_HEADROOM = float(os.getenv("PREWARM_MIN_HEADROOM", "0.5"))
+PREWARM_STARTUP_SECONDS = float(os.getenv("PREWARM_STARTUP_SECONDS", "5"))
+PREWARM_HALF_LIFE = float(os.getenv("PREWARM_HALF_LIFE", "3600"))
+PREWARM_MAX_QUERIES = int(os.getenv("PREWARM_MAX_QUERIES", "10000"))
+
+# Search cache settings (seconds / number of entries)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+
+# Cache shared between worker processes; tmpfs keeps it memory-backed. Set to "" to disable.
+SHARED_CACHE_PATH = os.getenv(
+    "SHARED_CACHE_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "musicapp-search-cache.sqlite3")
 )
+# A page of 25 full Deezer tracks takes about 32 KB, so 5000 entries use roughly 160 MB of tmpfs
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "5000"))
 
-# HTTP client for making requests to Deezer API
-http_client = httpx.AsyncClient(timeout=10.0)
+ROOT_CACHE_CONTROL = os.getenv("ROOT_CACHE_CONTROL", "public, max-age=60")
 
+# Frontend stylesheet and script, served under content-hashed names
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_FILES = {"app.css": "text/css; charset=utf-8", "app.js": "text/javascript; charset=utf-8"}
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
+# Image proxy settings
+IMAGE_PROXY_ENABLED = os.getenv("IMAGE_PROXY_ENABLED", "1") == "1"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "musicapp-images"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+IMAGE_MAX_SOURCE_BYTES = int(os.getenv("IMAGE_MAX_SOURCE_BYTES", str(5 * 1024 * 1024)))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_ALLOWED_HOSTS = tuple(
+    host.strip() for host in os.getenv("IMAGE_ALLOWED_HOSTS", "dzcdn.net").split(",") if host.strip()
+)
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pixel width requested for each Deezer image field suffix; "big" matches the 280 px result cards
+IMAGE_SIZES = {"small": 56, "medium": 250, "big": 320, "xl": 1000}
+# Upstream image content types remembered for serving originals without Pillow
+IMAGE_TYPES_MAX_ENTRIES = 10000
+
+# Preview audio proxy settings
+PREVIEW_PROXY_ENABLED = os.getenv("PREVIEW_PROXY_ENABLED", "1") == "1"
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "musicapp-previews"))
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+PREVIEW_URLS_MAX_ENTRIES = int(os.getenv("PREVIEW_URLS_MAX_ENTRIES", "50000"))
+PREVIEW_CACHE_CONTROL = "public, max-age=86400"
+PREVIEW_CHUNK_SIZE = 64 * 1024
+
+# Track fields returned by /api/search unless the caller asks for others with ``fields=``
+DEFAULT_SEARCH_FIELDS = "id,title,preview,artist.name,artist.picture_*,album.cover_big"
+
+
+# Phase durations of the current request when it carries a Server-Timing header, else None
+server_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timings", default=None)
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """Add to a phase duration of the current request's Server-Timing header, if it has one."""
+    timings = server_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+# Cache outcome and upstream status of the current request when it is access-logged, else None
+access_notes: ContextVar[Optional[Dict[str, str]]] = ContextVar("access_notes", default=None)
+
+
+def note_access(field: str, value: str) -> None:
+    """Set a field of the current request's access log record, if it has one."""
+    notes = access_notes.get()
+    if notes is not None:
+        notes[field] = value
+
+
+def json_dumps(value: Any) -> bytes:
+    """Serialize a value to compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(value: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Build a JSON response directly from bytes, bypassing FastAPI's jsonable_encoder."""
+    if server_timings.get() is None:
+        return Response(content=json_dumps(value), status_code=status_code, media_type="application/json", headers=headers)
+    started = time.perf_counter()
+    content = json_dumps(value)
+    add_timing("encode", time.perf_counter() - started)
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def normalize_query(q: str) -> str:
     """
-    Root endpoint that returns a psychedelic music search interface.
-    
-    Returns:
-        HTMLResponse: An interactive music search page
+    Normalize a search query so equivalent queries share one cache entry.
+
+    Applies Unicode NFKC normalization, case folding and whitespace collapsing.
     """
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>crazy musix explorer</title>
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-            
-            @keyframes gradientShift {
-                0% { background-position: 0% 0%; }
-                25% { background-position: 100% 0%; }
-                50% { background-position: 100% 100%; }
-                75% { background-position: 0% 100%; }
-                100% { background-position: 0% 0%; }
-            }
-            
-            @keyframes crazyFloat {
-                0% { transform: translateY(0px) rotate(0deg) scale(1); }
-                25% { transform: translateY(-15px) rotate(3deg) scale(1.02); }
-                50% { transform: translateY(0px) rotate(-3deg) scale(0.98); }
-                75% { transform: translateY(15px) rotate(5deg) scale(1.01); }
-                100% { transform: translateY(0px) rotate(0deg) scale(1); }
-            }
-            
-            @keyframes extremePulse {
-                0%, 100% { transform: scale(1) rotate(0deg); }
-                50% { transform: scale(1.05) rotate(2deg); }
-            }
-            
-            @keyframes rainbowGlow {
-                0% { box-shadow: 0 0 20px #ff0000, 0 0 40px #ff0000, 0 0 60px #ff0000; filter: hue-rotate(0deg); }
-                25% { box-shadow: 0 0 20px #00ff00, 0 0 40px #00ff00, 0 0 60px #00ff00; filter: hue-rotate(90deg); }
-                50% { box-shadow: 0 0 20px #0000ff, 0 0 40px #0000ff, 0 0 60px #0000ff; filter: hue-rotate(180deg); }
-                75% { box-shadow: 0 0 20px #ff00ff, 0 0 40px #ff00ff, 0 0 60px #ff00ff; filter: hue-rotate(270deg); }
-                100% { box-shadow: 0 0 20px #ff0000, 0 0 40px #ff0000, 0 0 60px #ff0000; filter: hue-rotate(360deg); }
-            }
-            
-            @keyframes wildSlide {
-                from {
-                    opacity: 0;
-                    transform: translateX(-50px) rotate(-10deg) scale(0.95);
-                }
-                to {
-                    opacity: 1;
-                    transform: translateX(0) rotate(0deg) scale(1);
-                }
-            }
-            
-            @keyframes crazySpinZoom {
-                0% { transform: rotate(0deg) scale(1); }
-                50% { transform: rotate(180deg) scale(1.1); }
-                100% { transform: rotate(360deg) scale(1); }
-            }
-            
-            @keyframes extremeGlitch {
-                0% { transform: translate(0) skew(0deg); filter: hue-rotate(0deg); }
-                10% { transform: translate(-3px, 2px) skew(1deg); filter: hue-rotate(90deg); }
-                20% { transform: translate(3px, -2px) skew(-1deg); filter: hue-rotate(180deg); }
-                30% { transform: translate(-2px, 3px) skew(2deg); filter: hue-rotate(270deg); }
-                40% { transform: translate(2px, -3px) skew(-2deg); filter: hue-rotate(360deg); }
-                50% { transform: translate(0) skew(0deg); filter: hue-rotate(0deg); }
-                60% { transform: translate(3px, 3px) skew(1deg); filter: hue-rotate(90deg); }
-                70% { transform: translate(-3px, -3px) skew(-1deg); filter: hue-rotate(180deg); }
-                80% { transform: translate(2px, -2px) skew(1deg); filter: hue-rotate(270deg); }
-                90% { transform: translate(-2px, 2px) skew(-1deg); filter: hue-rotate(360deg); }
-                100% { transform: translate(0) skew(0deg); filter: hue-rotate(0deg); }
-            }
-            
-            @keyframes shake {
-                0%, 100% { transform: translateX(0); }
-                10% { transform: translateX(-3px) rotate(-1deg); }
-                20% { transform: translateX(3px) rotate(1deg); }
-                30% { transform: translateX(-3px) rotate(-1deg); }
-                40% { transform: translateX(3px) rotate(1deg); }
-                50% { transform: translateX(-3px) rotate(-1deg); }
-                60% { transform: translateX(3px) rotate(1deg); }
-                70% { transform: translateX(-3px) rotate(-1deg); }
-                80% { transform: translateX(3px) rotate(1deg); }
-                90% { transform: translateX(-3px) rotate(-1deg); }
-            }
-            
-            @keyframes bounce {
-                0%, 100% { transform: translateY(0) scaleY(1); }
-                50% { transform: translateY(-20px) scaleY(1.05); }
-            }
-            
-            @keyframes colorShift {
-                0% { filter: hue-rotate(0deg) saturate(1.5); }
-                100% { filter: hue-rotate(360deg) saturate(1.5); }
-            }
-            
-            @keyframes wiggle {
-                0%, 100% { transform: rotate(0deg); }
-                25% { transform: rotate(5deg); }
-                75% { transform: rotate(-5deg); }
-            }
-            
-            @keyframes bombShake {
-                0%, 100% { transform: translate(0, 0) rotate(0deg); }
-                10% { transform: translate(-5px, -5px) rotate(-5deg); }
-                20% { transform: translate(5px, -5px) rotate(5deg); }
-                30% { transform: translate(-5px, 5px) rotate(-5deg); }
-                40% { transform: translate(5px, 5px) rotate(5deg); }
-                50% { transform: translate(-5px, -5px) rotate(-5deg); }
-                60% { transform: translate(5px, -5px) rotate(5deg); }
-                70% { transform: translate(-5px, 5px) rotate(-5deg); }
-                80% { transform: translate(5px, 5px) rotate(5deg); }
-                90% { transform: translate(-5px, 0) rotate(-5deg); }
-            }
-            
-            @keyframes bombExplode {
-                0% {
-                    transform: scale(1);
-                    opacity: 1;
-                }
-                50% {
-                    transform: scale(1.3);
-                    opacity: 0.8;
-                    filter: brightness(2) hue-rotate(180deg);
-                }
-                100% {
-                    transform: scale(1.5);
-                    opacity: 0;
-                    filter: brightness(3) hue-rotate(360deg);
-                }
-            }
-            
-            @keyframes bombPulse {
-                0%, 100% {
-                    transform: scale(1);
-                    filter: drop-shadow(0 0 10px #ff0000);
-                }
-                50% {
-                    transform: scale(1.1);
-                    filter: drop-shadow(0 0 30px #ff6600) drop-shadow(0 0 50px #ffff00);
-                }
-            }
-            
-            @keyframes blackHoleSuck {
-                0% {
-                    transform: scale(1) rotate(0deg) perspective(1000px) rotateX(0deg) rotateY(0deg);
-                    opacity: 1;
-                    filter: brightness(1) contrast(1) saturate(1) hue-rotate(0deg) blur(0px);
-                }
-                25% {
-                    transform: scale(0.8) rotate(360deg) perspective(1000px) rotateX(45deg) rotateY(45deg);
-                    opacity: 0.9;
-                    filter: brightness(1.5) contrast(2) saturate(3) hue-rotate(90deg) blur(2px);
-                }
-                50% {
-                    transform: scale(0.4) rotate(900deg) perspective(1000px) rotateX(90deg) rotateY(180deg);
-                    opacity: 0.5;
-                    filter: brightness(0.3) contrast(5) saturate(5) hue-rotate(180deg) blur(5px);
-                }
-                75% {
-                    transform: scale(0.1) rotate(1440deg) perspective(1000px) rotateX(180deg) rotateY(360deg);
-                    opacity: 0.2;
-                    filter: brightness(0.1) contrast(10) saturate(10) hue-rotate(270deg) blur(10px);
-                }
-                100% {
-                    transform: scale(0) rotate(2160deg) perspective(1000px) rotateX(360deg) rotateY(720deg);
-                    opacity: 0;
-                    filter: brightness(0) contrast(20) saturate(0) hue-rotate(360deg) blur(20px);
-                }
-            }
-            
-            @keyframes unicornRide {
-                0% {
-                    transform: scale(0) translateX(-300%) translateY(200%) rotate(-720deg) perspective(2000px) rotateX(-180deg) rotateY(-360deg);
-                    opacity: 0;
-                    filter: brightness(0) hue-rotate(0deg) saturate(0) contrast(0) blur(30px);
-                }
-                20% {
-                    transform: scale(0.5) translateX(-150%) translateY(100%) rotate(-360deg) perspective(2000px) rotateX(-90deg) rotateY(-180deg);
-                    opacity: 0.5;
-                    filter: brightness(2) hue-rotate(72deg) saturate(5) contrast(3) blur(15px);
-                }
-                40% {
-                    transform: scale(1) translateX(-50%) translateY(50%) rotate(-180deg) perspective(2000px) rotateX(-45deg) rotateY(-90deg);
-                    opacity: 0.8;
-                    filter: brightness(3) hue-rotate(144deg) saturate(8) contrast(5) blur(8px);
-                }
-                60% {
-                    transform: scale(1.3) translateX(20%) translateY(-20%) rotate(90deg) perspective(2000px) rotateX(45deg) rotateY(90deg);
-                    opacity: 1;
-                    filter: brightness(4) hue-rotate(216deg) saturate(10) contrast(7) blur(3px);
-                }
-                80% {
-                    transform: scale(1.1) translateX(10%) translateY(-10%) rotate(45deg) perspective(2000px) rotateX(20deg) rotateY(45deg);
-                    opacity: 1;
-                    filter: brightness(2.5) hue-rotate(288deg) saturate(6) contrast(4) blur(1px);
-                }
-                100% {
-                    transform: scale(1) translateX(0) translateY(0) rotate(0deg) perspective(2000px) rotateX(0deg) rotateY(0deg);
-                    opacity: 1;
-                    filter: brightness(1) hue-rotate(360deg) saturate(1.5) contrast(1) blur(0px);
-                }
-            }
-            
-            @keyframes blackHoleVortex {
-                0% {
-                    transform: scale(0) rotate(0deg);
-                    opacity: 0;
-                    box-shadow: 0 0 0 rgba(0, 0, 0, 0);
-                    filter: blur(0px) brightness(1);
-                }
-                25% {
-                    transform: scale(2) rotate(360deg);
-                    opacity: 0.8;
-                    box-shadow: 0 0 100px rgba(138, 43, 226, 0.8), 0 0 200px rgba(75, 0, 130, 0.6), inset 0 0 100px rgba(0, 0, 0, 0.9);
-                    filter: blur(5px) brightness(0.5);
-                }
-                50% {
-                    transform: scale(5) rotate(900deg);
-                    opacity: 1;
-                    box-shadow: 0 0 200px rgba(138, 43, 226, 1), 0 0 400px rgba(75, 0, 130, 0.8), 0 0 600px rgba(25, 0, 51, 0.6), inset 0 0 200px rgba(0, 0, 0, 1);
-                    filter: blur(10px) brightness(0.2);
-                }
-                75% {
-                    transform: scale(3) rotate(1440deg);
-                    opacity: 0.6;
-                    box-shadow: 0 0 150px rgba(138, 43, 226, 0.8), 0 0 300px rgba(75, 0, 130, 0.6), inset 0 0 150px rgba(0, 0, 0, 0.9);
-                    filter: blur(8px) brightness(0.3);
-                }
-                100% {
-                    transform: scale(0) rotate(2160deg);
-                    opacity: 0;
-                    box-shadow: 0 0 0 rgba(0, 0, 0, 0);
-                    filter: blur(20px) brightness(0);
-                }
-            }
-            
-            @keyframes unicornGallop {
-                0% {
-                    transform: translateY(0) rotate(0deg) scale(1);
-                    filter: drop-shadow(0 0 30px rgba(255, 0, 255, 0.8));
-                }
-                10% {
-                    transform: translateY(-40px) rotate(15deg) scale(1.1);
-                    filter: drop-shadow(0 0 50px rgba(255, 0, 0, 1)) drop-shadow(0 0 80px rgba(255, 127, 0, 0.8));
-                }
-                20% {
-                    transform: translateY(-20px) rotate(-10deg) scale(0.95);
-                    filter: drop-shadow(0 0 50px rgba(255, 255, 0, 1)) drop-shadow(0 0 80px rgba(0, 255, 0, 0.8));
-                }
-                30% {
-                    transform: translateY(-50px) rotate(20deg) scale(1.15);
-                    filter: drop-shadow(0 0 50px rgba(0, 255, 255, 1)) drop-shadow(0 0 80px rgba(0, 0, 255, 0.8));
-                }
-                40% {
-                    transform: translateY(-10px) rotate(-15deg) scale(0.9);
-                    filter: drop-shadow(0 0 50px rgba(75, 0, 130, 1)) drop-shadow(0 0 80px rgba(148, 0, 211, 0.8));
-                }
-                50% {
-                    transform: translateY(-60px) rotate(25deg) scale(1.2);
-                    filter: drop-shadow(0 0 60px rgba(255, 0, 255, 1)) drop-shadow(0 0 100px rgba(255, 0, 127, 0.9));
-                }
-                60% {
-                    transform: translateY(-30px) rotate(-20deg) scale(1.05);
-                    filter: drop-shadow(0 0 50px rgba(255, 127, 0, 1)) drop-shadow(0 0 80px rgba(255, 255, 0, 0.8));
-                }
-                70% {
-                    transform: translateY(-45px) rotate(18deg) scale(1.1);
-                    filter: drop-shadow(0 0 50px rgba(0, 255, 0, 1)) drop-shadow(0 0 80px rgba(0, 255, 255, 0.8));
-                }
-                80% {
-                    transform: translateY(-15px) rotate(-12deg) scale(0.98);
-                    filter: drop-shadow(0 0 50px rgba(0, 0, 255, 1)) drop-shadow(0 0 80px rgba(75, 0, 130, 0.8));
-                }
-                90% {
-                    transform: translateY(-35px) rotate(10deg) scale(1.08);
-                    filter: drop-shadow(0 0 50px rgba(148, 0, 211, 1)) drop-shadow(0 0 80px rgba(255, 0, 255, 0.8));
-                }
-                100% {
-                    transform: translateY(0) rotate(0deg) scale(1);
-                    filter: drop-shadow(0 0 40px rgba(255, 0, 255, 0.9)) drop-shadow(0 0 70px rgba(255, 127, 255, 0.7));
-                }
-            }
-            
-            @keyframes rainbowTrail {
-                0% {
-                    opacity: 0;
-                    transform: translateX(-200px) scale(0.5) rotate(-45deg);
-                    filter: blur(20px) brightness(0);
-                }
-                20% {
-                    opacity: 0.8;
-                    transform: translateX(-100px) scale(1.2) rotate(-20deg);
-                    filter: blur(10px) brightness(2) saturate(5);
-                }
-                40% {
-                    opacity: 1;
-                    transform: translateX(0) scale(1.5) rotate(0deg);
-                    filter: blur(5px) brightness(3) saturate(8);
-                }
-                60% {
-                    opacity: 1;
-                    transform: translateX(50px) scale(1.3) rotate(10deg);
-                    filter: blur(8px) brightness(2.5) saturate(6);
-                }
-                80% {
-                    opacity: 0.6;
-                    transform: translateX(150px) scale(1) rotate(30deg);
-                    filter: blur(15px) brightness(1.5) saturate(3);
-                }
-                100% {
-                    opacity: 0;
-                    transform: translateX(300px) scale(0.5) rotate(45deg);
-                    filter: blur(25px) brightness(0);
-                }
-            }
-            
-            @keyframes sparkleExplosion {
-                0% {
-                    transform: scale(0) rotate(0deg);
-                    opacity: 0;
-                }
-                50% {
-                    transform: scale(3) rotate(180deg);
-                    opacity: 1;
-                }
-                100% {
-                    transform: scale(5) rotate(360deg);
-                    opacity: 0;
-                }
-            }
-            
-            body.black-hole-active .container {
-                animation: blackHoleSuck 2s ease-in forwards;
-            }
-            
-            body.unicorn-return .container {
-                animation: unicornRide 2s ease-out forwards;
-            }
-            
-            .black-hole-overlay {
-                position: fixed;
-                top: 50%;
-                left: 50%;
-                width: 100px;
-                height: 100px;
-                transform: translate(-50%, -50%);
-                background: radial-gradient(circle, #000000 0%, #1a0033 30%, #330066 60%, transparent 100%);
-                border-radius: 50%;
-                pointer-events: none;
-                z-index: 9999;
-                opacity: 0;
-            }
-            
-            body.black-hole-active .black-hole-overlay {
-                animation: blackHoleVortex 2s ease-in-out forwards;
-            }
-            
-            .unicorn-overlay {
-                position: fixed;
-                bottom: -200px;
-                left: -200px;
-                font-size: 20rem;
-                z-index: 9998;
-                opacity: 0;
-                pointer-events: none;
-                filter: drop-shadow(0 0 30px rgba(255, 0, 255, 0.8));
-            }
-            
-            .unicorn-overlay::before {
-                content: '✨';
-                position: absolute;
-                font-size: 5rem;
-                animation: sparkleExplosion 1s infinite;
-            }
-            
-            .unicorn-overlay::after {
-                content: '⭐💫🌟✨🌈';
-                position: absolute;
-                font-size: 3rem;
-                white-space: nowrap;
-                animation: sparkleExplosion 1.5s infinite reverse;
-            }
-            
-            body.unicorn-return .unicorn-overlay {
-                animation: unicornGallop 2s ease-out forwards;
-                opacity: 1;
-                bottom: 20%;
-                left: 50%;
-                transform: translateX(-50%);
-            }
-            
-            .rainbow-trail {
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                pointer-events: none;
-                z-index: 9997;
-                opacity: 0;
-            }
-            
-            body.unicorn-return .rainbow-trail {
-                background:
-                    repeating-linear-gradient(90deg,
-                        transparent 0%,
-                        rgba(255, 0, 0, 0.6) 5%,
-                        rgba(255, 127, 0, 0.6) 10%,
-                        rgba(255, 255, 0, 0.6) 15%,
-                        rgba(0, 255, 0, 0.6) 20%,
-                        rgba(0, 255, 255, 0.6) 25%,
-                        rgba(0, 0, 255, 0.6) 30%,
-                        rgba(75, 0, 130, 0.6) 35%,
-                        rgba(148, 0, 211, 0.6) 40%,
-                        rgba(255, 0, 255, 0.6) 45%,
-                        transparent 50%),
-                    radial-gradient(circle at 30% 50%, rgba(255, 255, 0, 0.4) 0%, transparent 50%),
-                    radial-gradient(circle at 70% 50%, rgba(255, 0, 255, 0.4) 0%, transparent 50%),
-                    radial-gradient(circle at 50% 30%, rgba(0, 255, 255, 0.4) 0%, transparent 50%);
-                animation: rainbowTrail 2s ease-out forwards;
-                box-shadow: inset 0 0 100px rgba(255, 255, 255, 0.5);
-            }
-            
-            body {
-                font-family: 'Comic Sans MS', 'Courier New', monospace;
-                min-height: 100vh;
-                background: linear-gradient(-45deg, #ff00de, #00fff2, #ff6b00, #00ff88, #8000ff, #ff0000, #ffff00, #00ff00, #0000ff);
-                background-size: 800% 800%;
-                animation: gradientShift 20s ease infinite;
-                color: white;
-                overflow-x: hidden;
-                position: relative;
-            }
-            
-            body::before {
-                content: '🎵🎸🎹🎤🎧🎼🎺🎷🥁';
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                font-size: 5rem;
-                opacity: 0.1;
-                animation: crazySpinZoom 30s infinite, colorShift 15s infinite;
-                pointer-events: none;
-                z-index: 1;
-                display: flex;
-                flex-wrap: wrap;
-                justify-content: space-around;
-                align-items: center;
-            }
-            
-            body::after {
-                content: '';
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 200%;
-                height: 200%;
-                background:
-                    radial-gradient(circle at 20% 50%, rgba(255, 0, 222, 0.3) 0%, transparent 50%),
-                    radial-gradient(circle at 80% 50%, rgba(0, 255, 242, 0.3) 0%, transparent 50%),
-                    radial-gradient(circle at 50% 20%, rgba(255, 107, 0, 0.3) 0%, transparent 50%),
-                    radial-gradient(circle at 50% 80%, rgba(128, 0, 255, 0.3) 0%, transparent 50%);
-                animation: crazySpinZoom 60s infinite reverse;
-                pointer-events: none;
-                z-index: 1;
-            }
-            
-            .magic-button {
-                position: fixed;
-                bottom: 30px;
-                left: 50%;
-                transform: translateX(-50%);
-                padding: 1.5rem 3rem;
-                font-size: 1.5rem;
-                font-weight: bold;
-                background: linear-gradient(135deg, #ff00de, #00fff2, #ff6b00, #8000ff);
-                background-size: 300% 300%;
-                border: 4px solid white;
-                border-radius: 50px;
-                color: white;
-                cursor: pointer;
-                z-index: 1000;
-                animation: extremePulse 2s infinite, gradientShift 5s infinite;
-                text-transform: uppercase;
-                letter-spacing: 0.2rem;
-                box-shadow: 0 0 30px rgba(255, 0, 222, 0.8), 0 0 60px rgba(0, 255, 242, 0.6);
-                transition: all 0.3s;
-            }
-            
-            .magic-button:hover {
-                transform: translateX(-50%) scale(1.1) rotate(5deg);
-                animation: wiggle 0.5s infinite, rainbowGlow 2s infinite;
-            }
-            
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-                padding: 2rem;
-                position: relative;
-                z-index: 2;
-            }
-            
-            .header {
-                text-align: center;
-                margin-bottom: 3rem;
-                animation: crazyFloat 8s ease-in-out infinite;
-                transform-origin: center;
-            }
-            
-            h1 {
-                font-size: 5rem;
-                font-weight: 900;
-                text-transform: uppercase;
-                letter-spacing: 0.5rem;
-                background: linear-gradient(45deg, #ff00de, #00fff2, #ff6b00, #00ff88, #8000ff, #ff0000);
-                background-size: 300% 300%;
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-                animation: extremeGlitch 5s infinite, gradientShift 10s infinite, bounce 3s infinite;
-                margin-bottom: 0.5rem;
-                filter: drop-shadow(0 0 30px #ff00de) drop-shadow(0 0 60px #00fff2);
-                transform-style: preserve-3d;
-            }
-            
-            h1:hover {
-                animation: extremeGlitch 2s infinite, wiggle 2s infinite, extremePulse 2s infinite;
-            }
-            
-            .subtitle {
-                font-size: 1.5rem;
-                color: #fff;
-                text-shadow: 0 0 20px rgba(0, 255, 242, 1), 0 0 40px rgba(255, 0, 222, 1);
-                letter-spacing: 0.3rem;
-                animation: colorShift 10s infinite, extremePulse 4s infinite;
-                font-weight: bold;
-            }
-            
-            .help-btn {
-                position: fixed;
-                bottom: 30px;
-                left: 20px;
-                width: 70px;
-                height: 70px;
-                border-radius: 50%;
-                background: linear-gradient(135deg, #ff00de, #00fff2, #ff6b00, #8000ff);
-                background-size: 300% 300%;
-                border: 5px solid white;
-                color: white;
-                font-size: 2.5rem;
-                cursor: pointer;
-                z-index: 1000;
-                animation: extremePulse 3s infinite, rainbowGlow 6s infinite, gradientShift 10s infinite;
-                transition: all 0.5s;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-weight: bold;
-            }
-            
-            .help-btn:hover {
-                transform: scale(1.2) rotate(15deg);
-                animation: wiggle 1s infinite, extremePulse 1s infinite;
-            }
-            
-            .info-btn {
-                position: fixed;
-                bottom: 30px;
-                left: 110px;
-                width: 70px;
-                height: 70px;
-                border-radius: 50%;
-                background: linear-gradient(135deg, #8000ff, #ff6b00, #00fff2, #ff00de);
-                background-size: 300% 300%;
-                border: 5px solid white;
-                color: white;
-                font-size: 2.5rem;
-                cursor: pointer;
-                z-index: 1000;
-                animation: extremePulse 3s infinite reverse, rainbowGlow 6s infinite reverse, gradientShift 10s infinite reverse;
-                transition: all 0.5s;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-weight: bold;
-            }
-            
-            .info-btn:hover {
-                transform: scale(1.2) rotate(-15deg);
-                animation: wiggle 1s infinite reverse, extremePulse 1s infinite;
-            }
-            
-            .lang-btn {
-                position: fixed;
-                bottom: 30px;
-                left: 200px;
-                width: 70px;
-                height: 70px;
-                border-radius: 50%;
-                background: linear-gradient(135deg, #00ff88, #00fff2, #ff6b00, #ff00de);
-                background-size: 300% 300%;
-                border: 5px solid white;
-                color: white;
-                font-size: 1.8rem;
-                cursor: pointer;
-                z-index: 1000;
-                animation: extremePulse 3s infinite, rainbowGlow 6s infinite, gradientShift 10s infinite;
-                transition: all 0.5s;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-weight: bold;
-            }
-            
-            .lang-btn:hover {
-                transform: scale(1.2) rotate(10deg);
-                animation: wiggle 1s infinite, extremePulse 1s infinite;
-            }
-            
-            .help-modal {
-                display: none;
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                background: rgba(0, 0, 0, 0.8);
-                z-index: 999;
-                align-items: center;
-                justify-content: center;
-            }
-            
-            .help-modal.active {
-                display: flex;
-            }
-            
-            .help-content {
-                background: linear-gradient(135deg, #1a1a2e, #16213e);
-                padding: 2rem;
-                border-radius: 20px;
-                max-width: 500px;
-                max-height: 90vh;
-                overflow-y: auto;
-                border: 3px solid #00fff2;
-                box-shadow: 0 0 50px rgba(0, 255, 242, 0.5);
-                animation: slideIn 0.5s ease;
-            }
-            
-            .help-content h2 {
-                color: #ff00de;
-                margin-bottom: 1rem;
-                font-size: 2rem;
-            }
-            
-            .help-content p {
-                margin-bottom: 1rem;
-                line-height: 1.6;
-            }
-            
-            .close-btn {
-                background: #ff00de;
-                border: none;
-                color: white;
-                padding: 0.75rem 2rem;
-                border-radius: 25px;
-                cursor: pointer;
-                font-size: 1rem;
-                font-weight: bold;
-                margin-top: 1rem;
-                transition: all 0.3s;
-            }
-            
-            .close-btn:hover {
-                background: #00fff2;
-                transform: scale(1.05);
-            }
-            
-            .info-modal {
-                display: none;
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                background: rgba(0, 0, 0, 0.85);
-                z-index: 999;
-                align-items: center;
-                justify-content: center;
-            }
-            
-            .info-modal.active {
-                display: flex;
-            }
-            
-            .info-content {
-                background: linear-gradient(135deg, #2e1a4e, #3e1642);
-                padding: 2.5rem;
-                border-radius: 25px;
-                max-width: 600px;
-                border: 4px solid #8000ff;
-                box-shadow: 0 0 60px rgba(128, 0, 255, 0.6), 0 0 100px rgba(255, 0, 222, 0.4);
-                animation: slideIn 0.5s ease, pulse 3s infinite;
-                max-height: 90vh;
-                overflow-y: auto;
-            }
-            
-            /* Custom Scrollbar für Modals */
-            .help-content::-webkit-scrollbar,
-            .info-content::-webkit-scrollbar {
-                width: 10px;
-            }
-            
-            .help-content::-webkit-scrollbar-track,
-            .info-content::-webkit-scrollbar-track {
-                background: rgba(0, 0, 0, 0.3);
-                border-radius: 10px;
-            }
-            
-            .help-content::-webkit-scrollbar-thumb,
-            .info-content::-webkit-scrollbar-thumb {
-                background: linear-gradient(135deg, #ff00de, #00fff2);
-                border-radius: 10px;
-            }
-            
-            .help-content::-webkit-scrollbar-thumb:hover,
-            .info-content::-webkit-scrollbar-thumb:hover {
-                background: linear-gradient(135deg, #ff6b00, #8000ff);
-            }
-            
-            .info-content h2 {
-                color: #ff00de;
-                margin-bottom: 1.5rem;
-                font-size: 2.5rem;
-                text-align: center;
-                text-shadow: 0 0 20px rgba(255, 0, 222, 0.8);
-            }
-            
-            .info-content h3 {
-                color: #00fff2;
-                margin-top: 1.5rem;
-                margin-bottom: 1rem;
-                font-size: 1.5rem;
-                text-shadow: 0 0 15px rgba(0, 255, 242, 0.8);
-            }
-            
-            .info-content p, .info-content li {
-                margin-bottom: 1rem;
-                line-height: 1.8;
-                font-size: 1.05rem;
-            }
-            
-            .info-content ul {
-                margin-left: 1.5rem;
-                margin-bottom: 1rem;
-            }
-            
-            .ai-badge {
-                background: linear-gradient(135deg, #ff00de, #8000ff);
-                padding: 0.5rem 1rem;
-                border-radius: 15px;
-                display: inline-block;
-                margin: 1rem 0;
-                font-weight: bold;
-                animation: pulse 2s infinite;
-                box-shadow: 0 0 20px rgba(255, 0, 222, 0.6);
-            }
-            
-            .disclaimer-box {
-                background: rgba(255, 107, 0, 0.2);
-                border-left: 4px solid #ff6b00;
-                padding: 1rem;
-                margin: 1rem 0;
-                border-radius: 10px;
-            }
-            
-            .search-container {
-                background: rgba(255, 255, 255, 0.1);
-                backdrop-filter: blur(10px);
-                padding: 2rem;
-                border-radius: 30px;
-                border: 3px solid rgba(255, 255, 255, 0.3);
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                margin-bottom: 3rem;
-            }
-            
-            .search-form {
-                display: flex;
-                gap: 1rem;
-                flex-wrap: wrap;
-            }
-            
-            #searchInput {
-                flex: 1;
-                min-width: 250px;
-                padding: 1.2rem 1.5rem;
-                font-size: 1.2rem;
-                border: 3px solid #00fff2;
-                border-radius: 50px;
-                background: rgba(0, 0, 0, 0.5);
-                color: white;
-                outline: none;
-                transition: all 0.3s;
-                font-family: 'Courier New', monospace;
-            }
-            
-            #searchInput:focus {
-                border-color: #ff00de;
-                box-shadow: 0 0 20px rgba(255, 0, 222, 0.5);
-                transform: scale(1.02);
-            }
-            
-            #searchInput::placeholder {
-                color: rgba(255, 255, 255, 0.5);
-            }
-            
-            #searchBtn {
-                padding: 1.2rem 3rem;
-                font-size: 1.2rem;
-                font-weight: bold;
-                border: none;
-                border-radius: 50px;
-                background: linear-gradient(135deg, #ff00de, #ff6b00);
-                color: white;
-                cursor: pointer;
-                transition: all 0.3s;
-                text-transform: uppercase;
-                letter-spacing: 0.1rem;
-                animation: pulse 2s infinite;
-            }
-            
-            #searchBtn:hover {
-                transform: scale(1.05) rotate(-2deg);
-                box-shadow: 0 0 30px rgba(255, 0, 222, 0.8);
-            }
-            
-            #searchBtn:active {
-                transform: scale(0.95);
-            }
-            
-            .loading {
-                text-align: center;
-                padding: 3rem;
-                display: none;
-            }
-            
-            .loading.active {
-                display: block;
-            }
-            
-            .spinner {
-                width: 80px;
-                height: 80px;
-                border: 8px solid rgba(255, 255, 255, 0.2);
-                border-top: 8px solid #ff00de;
-                border-radius: 50%;
-                margin: 0 auto 1rem;
-                animation: spin 1s linear infinite;
-            }
-            
-            .loading-text {
-                font-size: 1.5rem;
-                color: #00fff2;
-                text-shadow: 0 0 10px rgba(0, 255, 242, 0.8);
-                animation: pulse 1s infinite;
-            }
-            
-            .error {
-                background: rgba(255, 0, 0, 0.2);
-                border: 2px solid #ff0000;
-                padding: 1.5rem;
-                border-radius: 15px;
-                margin-bottom: 2rem;
-                display: none;
-                animation: slideIn 0.5s ease;
-            }
-            
-            .error.active {
-                display: block;
-            }
-            
-            .error-text {
-                color: #ff6b6b;
-                font-size: 1.1rem;
-            }
-            
-            .results {
-                display: grid;
-                grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
-                gap: 2rem;
-            }
-            
-            .result-card {
-                background: rgba(255, 255, 255, 0.1);
-                backdrop-filter: blur(10px);
-                border-radius: 20px;
-                overflow: hidden;
-                border: 2px solid rgba(255, 255, 255, 0.2);
-                transition: all 0.3s;
-                animation: slideIn 0.5s ease;
-                cursor: pointer;
-            }
-            
-            .result-card:hover {
-                animation: bombShake 0.5s ease-in-out;
-                border-color: #ff0000;
-                box-shadow: 0 10px 40px rgba(255, 0, 0, 0.8), 0 0 60px rgba(255, 102, 0, 0.6);
-                position: relative;
-            }
-            
-            .result-card:hover::before {
-                content: '💣';
-                position: absolute;
-                top: 50%;
-                left: 50%;
-                transform: translate(-50%, -50%);
-                font-size: 8rem;
-                z-index: 10;
-                animation: bombPulse 0.5s ease-in-out, bombExplode 0.8s ease-out 0.5s forwards;
-                pointer-events: none;
-            }
-            
-            .result-card:hover::after {
-                content: '💥';
-                position: absolute;
-                top: 50%;
-                left: 50%;
-                transform: translate(-50%, -50%);
-                font-size: 12rem;
-                z-index: 9;
-                opacity: 0;
-                animation: bombExplode 0.6s ease-out 1.3s forwards;
-                pointer-events: none;
-            }
-            
-            .result-card img {
-                width: 100%;
-                height: 280px;
-                object-fit: cover;
-                transition: transform 0.3s;
-            }
-            
-            .result-card:hover img {
-                transform: scale(1.1);
-            }
-            
-            .result-info {
-                padding: 2rem;
-                animation: colorShift 10s infinite;
-            }
-            
-            .result-title {
-                font-size: 1.5rem;
-                font-weight: 900;
-                color: #00fff2;
-                margin-bottom: 0.5rem;
-                text-shadow: 0 0 20px rgba(0, 255, 242, 1), 0 0 40px rgba(255, 0, 222, 1);
-                animation: extremePulse 4s infinite, bounce 5s infinite;
-                text-transform: uppercase;
-            }
-            
-            .result-artist {
-                font-size: 1.3rem;
-                font-weight: bold;
-                color: #ff00de;
-                text-shadow: 0 0 20px rgba(255, 0, 222, 1), 0 0 40px rgba(0, 255, 242, 1);
-                animation: wiggle 4s infinite, colorShift 10s infinite;
-            }
-            
-            .audio-controls {
-                padding: 1rem;
-                display: flex;
-                align-items: center;
-                gap: 1rem;
-                background: rgba(0, 0, 0, 0.5);
-                border-top: 3px solid;
-                border-image: linear-gradient(45deg, #ff00de, #00fff2) 1;
-            }
-            
-            .play-btn {
-                width: 60px;
-                height: 60px;
-                border-radius: 50%;
-                border: 3px solid #00fff2;
-                background: linear-gradient(135deg, #ff00de, #ff6b00);
-                color: white;
-                font-size: 1.5rem;
-                cursor: pointer;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                transition: all 0.5s;
-                animation: extremePulse 4s infinite;
-                flex-shrink: 0;
-            }
-            
-            .play-btn:hover {
-                transform: scale(1.15) rotate(10deg);
-                animation: wiggle 1s infinite, rainbowGlow 3s infinite;
-            }
-            
-            .play-btn.playing {
-                background: linear-gradient(135deg, #00fff2, #00ff88);
-                animation: crazySpinZoom 6s infinite, rainbowGlow 4s infinite;
-            }
-            
-            .audio-progress {
-                flex: 1;
-                height: 10px;
-                background: rgba(255, 255, 255, 0.2);
-                border-radius: 5px;
-                overflow: hidden;
-                position: relative;
-            }
-            
-            .audio-progress-bar {
-                height: 100%;
-                background: linear-gradient(90deg, #ff00de, #00fff2, #ff6b00);
-                background-size: 200% 100%;
-                width: 0%;
-                transition: width 0.1s linear;
-                animation: gradientShift 5s infinite;
-            }
-            
-            .audio-time {
-                color: #00fff2;
-                font-size: 0.9rem;
-                font-weight: bold;
-                text-shadow: 0 0 10px rgba(0, 255, 242, 0.8);
-                min-width: 45px;
-                text-align: center;
-            }
-            
-            @media (max-width: 768px) {
-                body {
-                    padding: 1rem 0.5rem;
-                }
-                
-                h1 {
-                    font-size: 2rem;
-                    letter-spacing: 0.2rem;
-                }
-                
-                .subtitle {
-                    font-size: 1rem;
-                    letter-spacing: 0.15rem;
-                }
-                
-                .container {
-                    padding: 1rem;
-                }
-                
-                .search-form {
-                    flex-direction: column;
-                    gap: 1rem;
-                }
-                
-                #searchInput, #searchBtn {
-                    width: 100%;
-                    font-size: 1rem;
-                }
-                
-                #searchBtn {
-                    padding: 1rem;
-                }
-                
-                .results {
-                    grid-template-columns: 1fr;
-                    gap: 1.5rem;
-                }
-                
-                .result-card {
-                    padding: 1rem;
-                }
-                
-                .result-title {
-                    font-size: 1.2rem;
-                }
-                
-                .result-artist {
-                    font-size: 1rem;
-                }
-                
-                .help-btn, .info-btn, .lang-btn {
-                    width: 55px;
-                    height: 55px;
-                    font-size: 1.8rem;
-                    border: 4px solid white;
-                }
-                
-                .help-btn {
-                    bottom: 20px;
-                    left: 15px;
-                }
-                
-                .info-btn {
-                    bottom: 20px;
-                    left: 85px;
-                }
-                
-                .lang-btn {
-                    bottom: 20px;
-                    left: 155px;
-                    font-size: 1.5rem;
-                }
-                
-                .magic-button {
-                    bottom: 20px;
-                    left: 50%;
-                    transform: translateX(-50%);
-                    padding: 1rem 2rem;
-                    font-size: 1rem;
-                    letter-spacing: 0.1rem;
-                }
-                
-                .help-content, .info-content {
-                    margin: 1rem;
-                    padding: 1.5rem;
-                    max-width: 90%;
-                    max-height: 85vh;
-                }
-                
-                .help-content h2, .info-content h2 {
-                    font-size: 1.5rem;
-                }
-                
-                .info-content h3 {
-                    font-size: 1.2rem;
-                }
-                
-                .help-content p, .info-content p, .info-content li {
-                    font-size: 0.95rem;
-                }
-                
-                .search-container {
-                    padding: 1.5rem;
-                }
-                
-                .loading-text {
-                    font-size: 1rem;
-                }
-                
-                .error-content {
-                    padding: 1.5rem;
-                }
-            }
-            
-            @media (max-width: 480px) {
-                h1 {
-                    font-size: 1.5rem;
-                    letter-spacing: 0.1rem;
-                }
-                
-                .subtitle {
-                    font-size: 0.9rem;
-                }
-                
-                .help-btn, .info-btn, .lang-btn {
-                    width: 45px;
-                    height: 45px;
-                    font-size: 1.3rem;
-                    border: 3px solid white;
-                }
-                
-                .help-btn {
-                    bottom: 15px;
-                    left: 10px;
-                }
-                
-                .info-btn {
-                    bottom: 15px;
-                    left: 65px;
-                }
-                
-                .lang-btn {
-                    bottom: 15px;
-                    left: 120px;
-                    font-size: 1.1rem;
-                }
-                
-                .magic-button {
-                    padding: 0.8rem 1.2rem;
-                    font-size: 0.8rem;
-                    bottom: 15px;
-                    left: 50%;
-                    transform: translateX(-50%);
-                }
-                
-                .result-card img {
-                    height: 200px;
-                }
-                
-                .play-btn {
-                    width: 50px;
-                    height: 50px;
-                    font-size: 1.2rem;
-                }
-                
-                .audio-time {
-                    font-size: 0.9rem;
-                }
-                
-                .info-content {
-                    padding: 1rem;
-                }
-                
-                .ai-badge {
-                    font-size: 0.9rem;
-                    padding: 0.4rem 0.8rem;
-                }
-            }
-        </style>
+    return " ".join(unicodedata.normalize("NFKC", q).casefold().split())
+
+
+def search_key(query: str, index: int = 0, limit: int = DEEZER_PAGE_SIZE) -> str:
+    """
+    Build the cache key for one page of results of a normalized query.
+
+    The first page with the default size is keyed by the query alone. Other
+    pages append ``index`` and ``limit`` separated by U+001F, which normalized
+    queries never contain since it counts as whitespace.
+    """
+    if index == 0 and limit == DEEZER_PAGE_SIZE:
+        return query
+    return f"{query}\x1f{index}\x1f{limit}"
+
+
+def log2_add(a: Optional[float], b: float) -> float:
+    """Return ``log2(2**a + 2**b)`` without overflowing; ``a`` may be None for an empty sum."""
+    if a is None:
+        return b
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+class SearchCache:
+    """
+    Bounded in-process LRU cache for Deezer search results.
+
+    Entries are fresh for ``ttl`` seconds. After that they may still be served
+    for up to ``stale_ttl`` more seconds while a background refresh runs
+    (stale-while-revalidate). Fully expired entries stay until evicted so
+    ``peek`` can return them as a last resort when Deezer is down.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, stale_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Look up a cached value.
+
+        Returns:
+            tuple: ``(value, is_fresh)``, or None on a miss or a fully expired entry
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            return None
+        self._entries.move_to_end(key)
+        return value, age <= self.ttl
+
+    def age(self, key: str) -> Optional[float]:
+        """Return the age in seconds of a cached entry, or None if it is not cached."""
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return a cached value regardless of its age, or None."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key: str, value: Any, age: float = 0.0) -> None:
+        """Store a value, evicting the least recently used entries over the cap."""
+        self._entries[key] = (time.monotonic() - age, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one shared task.
+
+    The first caller for a key starts the work as an independent task; every
+    other caller arriving while it runs awaits that same task. Callers await
+    through ``asyncio.shield``, so a cancelled (e.g. disconnected) caller does
+    not cancel the shared work. Exceptions are delivered to every waiter.
+
+    With ``cancel_abandoned``, work started by ``do()`` is cancelled once every
+    caller waiting for it has been cancelled, so nobody keeps waiting on an
+    upstream request whose result no client wants. Work started by ``start()``
+    alone (e.g. a background refresh) always runs to completion, and work
+    taken with ``keep()`` does too, even if ``do()`` callers started it.
+    """
+
+    def __init__(self, cancel_abandoned: bool = False):
+        self.cancel_abandoned = cancel_abandoned
+        self._tasks: Dict[str, "asyncio.Task"] = {}
+        self._waiters: Dict["asyncio.Task", int] = {}
+
+    def start(self, key: str, factory: Callable[[], Awaitable[Any]]) -> "asyncio.Task":
+        """Return the in-flight task for ``key``, starting ``factory()`` if there is none."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        return task
+
+    def keep(self, key: str, factory: Callable[[], Awaitable[Any]]) -> "asyncio.Task":
+        """Like ``start()``, but hold the task until it finishes so abandoned ``do()`` callers cannot cancel it."""
+        task = self.start(key, factory)
+        if self.cancel_abandoned and not task.done():
+            self._waiters[task] = self._waiters.get(task, 0) + 1
+            task.add_done_callback(self._release)
+        return task
+
+    def _release(self, task: "asyncio.Task") -> None:
+        remaining = self._waiters.get(task, 0) - 1
+        if remaining > 0:
+            self._waiters[task] = remaining
+        else:
+            self._waiters.pop(task, None)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory()`` once per key among concurrent callers and return its result."""
+        created = key not in self._tasks
+        task = self.start(key, factory)
+        if not self.cancel_abandoned or (not created and task not in self._waiters):
+            return await asyncio.shield(task)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                # No-op when the task has finished
+                task.cancel()
+
+    def _finish(self, key: str, task: "asyncio.Task") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tasks
+
+
+class SharedSearchStore:
+    """
+    Search result store shared by all worker processes on one host.
+
+    Backed by a SQLite database in WAL mode, normally on tmpfs, so pages are
+    memory-mapped and readers never block the writer. Reads run inline;
+    writes are serialized and handed to a dedicated writer thread, so the
+    event loop never waits for the database lock. Each write is a single
+    atomic ``INSERT OR REPLACE``. Entries older than ``ttl + stale_ttl`` are
+    treated as misses; every ``PURGE_EVERY`` writes the writer deletes up to
+    ``PURGE_BATCH`` expired or excess entries, oldest first via the
+    ``stored_at`` index, so no purge ever scans the whole table. Store
+    errors are treated as misses so the cache can never fail a request.
+    """
+
+    PURGE_EVERY = 64
+    PURGE_BATCH = 256
+
+    def __init__(self, path: str, ttl: float, stale_ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer_pid: Optional[int] = None
+        self._writes = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=0.05, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache "
+            "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS search_cache_stored_at ON search_cache (stored_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_popularity (query TEXT PRIMARY KEY, score REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS query_popularity_score ON query_popularity (score)")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not be shared across fork(), so open one per process
+        if self._conn is None or self._pid != os.getpid():
+            self._conn, self._pid = self._open(), os.getpid()
+        return self._conn
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork() either
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache-writer")
+            self._writer_conn = None
+            self._writer_pid = os.getpid()
+        return self._writer
+
+    def get(self, key: str, allow_expired: bool = False) -> Optional[Tuple[Any, float]]:
+        """
+        Look up a shared entry.
+
+        Args:
+            key: Cache key
+            allow_expired: Also return entries past their TTL that are not purged yet
+
+        Returns:
+            tuple: ``(value, age_in_seconds)``, or None on a miss or an expired entry
+        """
+        try:
+            row = self._connection().execute(
+                "SELECT stored_at, value FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        age = max(time.time() - row[0], 0.0)
+        if age > self.ttl + self.stale_ttl and not allow_expired:
+            return None
+        return json_loads(row[1]), age
+
+    def set(self, key: str, value: Any) -> None:
+        """Queue an atomic write of a value for every worker to see, without waiting for it."""
+        try:
+            self._executor().submit(self._write, key, time.time(), json_dumps(value))
+        except RuntimeError:
+            # The writer was shut down by close()
+            pass
+
+    def _write(self, key: str, stored_at: float, data: bytes) -> None:
+        # Runs on the writer thread, the only user of its connection
+        try:
+            conn = self._writer_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, stored_at, value) VALUES (?, ?, ?)", (key, stored_at, data)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self.purge(conn)
+        except sqlite3.Error:
+            pass
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._writer_conn is None:
+            self._writer_conn = self._open()
+        return self._writer_conn
+
+    def add_popularity(self, scores: Dict[str, float]) -> None:
+        """
+        Queue a merge of log2 forward-decayed query scores (see ``QueryPopularity``)
+        into the store, without waiting for it.
+
+        The read-modify-write runs on the writer thread in one write transaction,
+        so concurrent flushes from other workers are not lost.
+        """
+        if not scores:
+            return
+        try:
+            self._executor().submit(self._merge_popularity, dict(scores))
+        except RuntimeError:
+            # The writer was shut down by close()
+            pass
+
+    def _merge_popularity(self, scores: Dict[str, float]) -> None:
+        # Runs on the writer thread; BEGIN IMMEDIATE may wait on other workers' locks
+        try:
+            conn = self._writer_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                merged = dict(scores)
+                for chunk in range(0, len(scores), 500):
+                    queries = list(scores)[chunk:chunk + 500]
+                    rows = conn.execute(
+                        "SELECT query, score FROM query_popularity WHERE query IN (%s)" % ",".join("?" * len(queries)),
+                        queries
+                    ).fetchall()
+                    for query, score in rows:
+                        merged[query] = log2_add(merged[query], score)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO query_popularity (query, score) VALUES (?, ?)", merged.items()
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass
+
+    def popular_queries(self, limit: int) -> List[str]:
+        """Return the ``limit`` queries with the highest decayed scores, most popular first."""
+        try:
+            rows = self._connection().execute(
+                "SELECT query FROM query_popularity ORDER BY score DESC LIMIT ?", (limit,)
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [row[0] for row in rows]
+
+    def purge(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        Delete up to ``PURGE_BATCH`` expired entries, then up to ``PURGE_BATCH`` of
+        the oldest entries above ``max_entries``, and trim popularity scores likewise.
+
+        Each step walks an index from its low end, so its cost does not grow
+        with the size of the table; repeated calls converge on the limits.
+        """
+        conn = conn or self._connection()
+        conn.execute(
+            "DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache "
+            "WHERE stored_at < ? ORDER BY stored_at LIMIT ?)",
+            (time.time() - self.ttl - self.stale_ttl, self.PURGE_BATCH)
+        )
+        for table, column, order in (("search_cache", "key", "stored_at"), ("query_popularity", "query", "score")):
+            excess = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE {column} IN (SELECT {column} FROM {table} ORDER BY {order} LIMIT ?)",
+                    (min(excess, self.PURGE_BATCH),)
+                )
+
+    def flush(self) -> None:
+        """Wait until every write queued so far is in the database."""
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._writer.submit(lambda: None).result()
+
+    def close(self) -> None:
+        """Finish queued writes and close the connections."""
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._writer.shutdown(wait=True)
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+        self._writer = self._writer_conn = self._writer_pid = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class UpstreamTrace:
+    """
+    httpcore ``trace`` extension callback that splits one upstream request into phases.
+
+    Reports the wait for a pooled connection, the connect and TLS handshake of
+    a new connection, time to first byte and the body download. Transports
+    that emit no trace events (e.g. mocks) are reported as one ``upstream`` phase.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        self.marks[event] = time.perf_counter()
+
+    def phases(self) -> Dict[str, float]:
+        finished = time.perf_counter()
+        marks = self.marks
+        sent = marks.get("http11.send_request_headers.started", marks.get("http2.send_request_headers.started"))
+        received = marks.get(
+            "http11.receive_response_headers.complete", marks.get("http2.receive_response_headers.complete")
+        )
+        if sent is None or received is None:
+            return {"upstream": finished - self.started}
+        connect = 0.0
+        for step in ("connection.connect_tcp", "connection.start_tls"):
+            if f"{step}.started" in marks and f"{step}.complete" in marks:
+                connect += marks[f"{step}.complete"] - marks[f"{step}.started"]
+        return {
+            "pool": max(sent - self.started - connect, 0.0),
+            "connect": connect,
+            "upstream-ttfb": received - sent,
+            "upstream-body": finished - received,
+        }
+
+
+class UpstreamClient:
+    """
+    Owns the pooled HTTP client used for all Deezer API calls.
+
+    The client is created by ``start()`` in the application lifespan with
+    explicit pool limits, keep-alive expiry, per-phase timeouts and optional
+    HTTP/2, and pre-opens connections so the first user requests skip the
+    TCP/TLS handshake.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        limits: httpx.Limits,
+        timeout: httpx.Timeout,
+        http2: bool = False,
+        warmup_connections: int = 0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = base_url
+        self.limits = limits
+        self.timeout = timeout
+        # HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+        self.http2 = http2 and h2 is not None
+        self.warmup_connections = warmup_connections
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("Upstream client is not started")
+        return self._client
+
+    async def start(self) -> None:
+        """Create the client and warm up its connection pool."""
+        self._client = httpx.AsyncClient(
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=self.http2,
+            transport=self.transport
+        )
+        if self.warmup_connections > 0:
+            await self.warm_up(self.warmup_connections)
+
+    async def warm_up(self, connections: int) -> None:
+        """
+        Open ``connections`` keep-alive connections by issuing concurrent requests.
+
+        Failures are ignored: a cold pool only costs latency, so Deezer being
+        unreachable must not prevent the application from starting.
+        """
+        url = self.base_url + "/infos"
+        await asyncio.gather(
+            *(self.client.get(url, timeout=self.timeout.connect) for _ in range(connections)),
+            return_exceptions=True
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report connection pool usage.
+
+        Returns:
+            dict: Open, in-use and idle connections, and active and waiting requests
+        """
+        stats = {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "connections": 0,
+            "in_use": 0,
+            "idle": 0,
+            "active_requests": 0,
+            "waiting_requests": 0,
+        }
+        # httpx does not expose pool statistics, so read them from its httpcore pool
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = pool.connections
+            idle = sum(1 for connection in connections if connection.is_idle())
+            waiting = sum(1 for request in pool._requests if request.is_queued())
+            stats.update(
+                connections=len(connections),
+                in_use=len(connections) - idle,
+                idle=idle,
+                active_requests=len(pool._requests) - waiting,
+                waiting_requests=waiting
+            )
+        return stats
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client goes away before its response is ready."""
+
+
+class QuotaExceeded(Exception):
+    """Raised when the upstream request queue is full."""
+
+
+class TokenBucketGovernor:
+    """
+    Async token bucket that paces upstream requests under the Deezer quota.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A request takes a
+    token immediately if one is available; otherwise it waits in a bounded
+    queue ordered by priority (lower first), then arrival. Waiters are woken
+    by a timer when the next token is due, so no polling is involved.
+    """
+
+    PRIORITY_INTERACTIVE = 0
+    PRIORITY_BACKGROUND = 1
+
+    def __init__(self, rate: float, burst: int, max_queue: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queue: list = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._acquired = {self.PRIORITY_INTERACTIVE: 0, self.PRIORITY_BACKGROUND: 0}
+        self._wait_total = {self.PRIORITY_INTERACTIVE: 0.0, self.PRIORITY_BACKGROUND: 0.0}
+        self._wait_max = {self.PRIORITY_INTERACTIVE: 0.0, self.PRIORITY_BACKGROUND: 0.0}
+        self._rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """
+        Wait for a token.
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            QuotaExceeded: If the wait queue is full
+        """
+        self._refill()
+        if self._tokens >= 1 and self._waiting == 0:
+            self._tokens -= 1
+            self._record(priority, 0.0)
+            return 0.0
+        if self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise QuotaExceeded("Too many queued Deezer requests")
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self._waiting += 1
+        future.add_done_callback(self._on_done)
+        self._schedule()
+        await future
+        waited = time.monotonic() - started
+        self._record(priority, waited)
+        return waited
+
+    def try_acquire(self, priority: int = PRIORITY_INTERACTIVE) -> bool:
+        """Take a token if one is available right now and nobody is waiting, without ever queueing."""
+        self._refill()
+        if self._tokens >= 1 and self._waiting == 0:
+            self._tokens -= 1
+            self._record(priority, 0.0)
+            return True
+        return False
+
+    def _on_done(self, future: asyncio.Future) -> None:
+        self._waiting -= 1
+        if future.cancelled():
+            # The cancelled entry is skipped lazily when it reaches the head of the queue
+            self._schedule()
+
+    def _record(self, priority: int, waited: float) -> None:
+        self._acquired[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._waiting:
+            delay = max((1 - self._tokens) / self.rate, 0.0)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self._tokens -= 1
+                future.set_result(None)
+        while self._queue and self._queue[0][2].done():
+            heapq.heappop(self._queue)
+        self._schedule()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report token availability, queue depth and wait times.
+
+        Returns:
+            dict: Governor state, with acquired requests and wait times per priority class
+        """
+        self._refill()
+        classes = {}
+        for name, priority in (("interactive", self.PRIORITY_INTERACTIVE), ("background", self.PRIORITY_BACKGROUND)):
+            acquired = self._acquired[priority]
+            classes[name] = {
+                "acquired": acquired,
+                "avg_wait_seconds": self._wait_total[priority] / acquired if acquired else 0.0,
+                "max_wait_seconds": self._wait_max[priority],
+            }
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": self._tokens,
+            "queue_depth": self._waiting,
+            "max_queue": self.max_queue,
+            "rejected": self._rejected,
+            "priorities": classes,
+        }
+
+
+class CircuitOpen(Exception):
+    """Raised when the circuit breaker rejects a call."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for upstream calls, driven by error rate and latency.
+
+    Outcomes of the last ``window`` calls are tracked; failed calls and calls
+    slower than ``slow_call_seconds`` both count as failures. Once at least
+    ``min_calls`` are recorded and the failure ratio reaches
+    ``failure_ratio``, the circuit opens and calls are rejected immediately.
+    After ``open_seconds`` it becomes half-open and lets a single probe
+    through: success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int, min_calls: int, failure_ratio: float, slow_call_seconds: float, open_seconds: float):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes: "deque[bool]" = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejected = 0
+
+    def before_call(self) -> bool:
+        """
+        Admit a call, or reject it without waiting.
+
+        Every admitted call must be followed by exactly one ``record``, passing
+        on the value returned here.
+
+        Returns:
+            bool: Whether the call is the half-open probe
+
+        Raises:
+            CircuitOpen: If the circuit is open, or half-open with a probe in flight
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self._rejected += 1
+                raise CircuitOpen("Deezer API circuit is open")
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self._rejected += 1
+                raise CircuitOpen("Deezer API circuit is half-open")
+            self._probing = True
+            return True
+        return False
+
+    def record(self, success: Optional[bool], latency: float = 0.0, probe: bool = False) -> None:
+        """
+        Record the outcome of an admitted call.
+
+        Only the probe decides the half-open transition; calls admitted while
+        the circuit was closed that finish later only count towards the window.
+
+        Args:
+            success: Whether the upstream call succeeded, or None if it never
+                reached the upstream (the call is then not counted)
+            latency: Duration of the upstream call in seconds
+            probe: The value ``before_call`` returned for this call
+        """
+        failed = success is not None and (not success or latency > self.slow_call_seconds)
+        if probe:
+            self._probing = False
+            if success is None:
+                return
+            if failed:
+                self._open()
+            else:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+            return
+        if success is None:
+            return
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._failures -= self._outcomes[0]
+        self._outcomes.append(failed)
+        self._failures += failed
+        if (
+            self.state == self.CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and self._failures >= self.failure_ratio * len(self._outcomes)
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the breaker state.
+
+        Returns:
+            dict: State, failure ratio over the window and rejected call count
+        """
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "failure_ratio": self._failures / calls if calls else 0.0,
+            "rejected": self._rejected,
+        }
+
+
+class HedgingPolicy:
+    """
+    Decides when a slow Deezer request gets a second, identical "hedge" request.
+
+    The hedge delay is the ``percentile`` of the last ``window`` request
+    latencies, never below ``min_delay``, and is recomputed every tenth of
+    a window; until ``min_samples`` latencies are known nothing is hedged.
+    Hedges are capped by a budget: every request earns ``budget`` credit (up
+    to ``burst``) and every hedge spends one, so hedges stay below a
+    ``budget`` fraction of requests however slow Deezer gets.
+    """
+
+    def __init__(
+        self, percentile: float, budget: float, window: int, min_samples: int, min_delay: float, burst: float = 10.0
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.burst = burst
+        self._latencies: "deque[float]" = deque(maxlen=window)
+        self._update_every = max(window // 10, 1)
+        self._since_update = 0
+        self._delay: Optional[float] = None
+        self._credit = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds after which a request should be hedged, or None while too few latencies are known."""
+        return self._delay
+
+    def observe(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+        self._since_update += 1
+        if len(self._latencies) < self.min_samples:
+            return
+        if self._delay is None or self._since_update >= self._update_every:
+            ordered = sorted(self._latencies)
+            self._delay = max(ordered[min(int(self.percentile * len(ordered)), len(ordered) - 1)], self.min_delay)
+            self._since_update = 0
+
+    def start_request(self) -> None:
+        self.requests += 1
+        self._credit = min(self._credit + self.budget, self.burst)
+
+    def has_budget(self) -> bool:
+        if self._credit < 1:
+            self.over_budget += 1
+            return False
+        return True
+
+    def spend(self) -> None:
+        self._credit -= 1
+        self.hedged += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the hedge delay and how often hedges were sent and won.
+
+        Returns:
+            dict: Current delay, request and hedge counts, and hedges skipped for lack of budget
+        """
+        return {
+            "delay_seconds": self._delay,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "over_budget": self.over_budget,
+            "budget_credit": self._credit,
+        }
+
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed buckets.
+
+    Observing a value is a bisect and three increments. All updates happen on
+    the event loop thread, so no locking is needed.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf bucket, non-cumulative until rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    In-process metrics registry rendered in the Prometheus text format.
+
+    Series are created on first use and then only updated in place, so the
+    hot path performs dictionary lookups and counter increments.
+    """
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.request_latency: Dict[str, Histogram] = {}
+        self.response_size: Dict[str, list] = {}
+        self.in_flight = 0
+        self.upstream_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.upstream_in_flight = 0
+        # Callables returning extra gauge families at scrape time: name -> (help, {labels: value})
+        self.collectors: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float, size: int) -> None:
+        key = (route, method, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.request_latency.get(route)
+        if histogram is None:
+            histogram = self.request_latency[route] = Histogram()
+        histogram.observe(seconds)
+        summary = self.response_size.get(route)
+        if summary is None:
+            summary = self.response_size[route] = [0, 0]
+        summary[0] += 1
+        summary[1] += size
+
+    def observe_upstream(self, endpoint: str, status: str, seconds: float) -> None:
+        key = (endpoint, status)
+        histogram = self.upstream_latency.get(key)
+        if histogram is None:
+            histogram = self.upstream_latency[key] = Histogram()
+        histogram.observe(seconds)
+
+    def render(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        lines = [
+            "# HELP http_requests_total Requests handled, by route, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (route, method, status), value in self.requests.items():
+            lines.append(f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {value}')
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        self._render_histograms(
+            lines, "http_request_duration_seconds", "Request latency, by route.",
+            {f'route="{route}"': histogram for route, histogram in self.request_latency.items()}
+        )
+        lines += [
+            "# HELP http_response_size_bytes Response body size, by route.",
+            "# TYPE http_response_size_bytes summary",
+        ]
+        for route, (count, total) in self.response_size.items():
+            lines.append(f'http_response_size_bytes_count{{route="{route}"}} {count}')
+            lines.append(f'http_response_size_bytes_sum{{route="{route}"}} {total}')
+        self._render_histograms(
+            lines, "upstream_request_duration_seconds", "Deezer API call latency, by endpoint and status.",
+            {f'endpoint="{endpoint}",status="{status}"': histogram
+             for (endpoint, status), histogram in self.upstream_latency.items()}
+        )
+        lines += [
+            "# HELP upstream_requests_in_flight Deezer API calls currently in progress.",
+            "# TYPE upstream_requests_in_flight gauge",
+            f"upstream_requests_in_flight {self.upstream_in_flight}",
+        ]
+        for name, (help_text, collect) in self.collectors.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for labels, value in collect().items():
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines: list, name: str, help_text: str, series: Dict[str, Histogram]) -> None:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, histogram in series.items():
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts, latency and response
+    sizes, and the number of requests in flight.
+
+    Routes are labelled by their path template (e.g. ``/api/search``), and
+    unmatched paths share the ``other`` label to keep cardinality bounded.
+    When the access log is enabled, each request is also handed to it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        metrics.in_flight += 1
+        notes = token = None
+        if access_log is not None:
+            notes = {}
+            token = access_notes.set(notes)
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            matched = scope.get("route")
+            route = matched.path if matched is not None else "other"
+            latency = time.perf_counter() - started
+            metrics.observe_request(route, scope["method"], status, latency, size)
+            if notes is not None:
+                access_notes.reset(token)
+                access_log.record((
+                    time.time(), scope["method"], route, status, latency, size,
+                    scope["query_string"], notes.get("cache"), notes.get("upstream")
+                ))
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a ``Server-Timing`` header with per-phase durations.
+
+    Applies to a random ``sample_rate`` fraction of requests, and, with
+    ``opt_in``, to requests sending ``X-Server-Timing: 1``. Other requests
+    pass straight through, and code recording phases via ``add_timing`` does
+    nothing for them.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0, opt_in: bool = False):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.opt_in = opt_in
+
+    def _wanted(self, scope) -> bool:
+        if self.opt_in and (b"x-server-timing", b"1") in scope["headers"]:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = server_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                timings["total"] = time.perf_counter() - started
+                value = ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+                message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", value.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            server_timings.reset(token)
+
+
+class AccessLog:
+    """
+    Structured JSON access log written by a background thread.
+
+    ``record`` only appends a tuple of raw fields to a bounded deque, so the
+    event loop never formats JSON or touches the disk; when ``max_queue``
+    records are already waiting the new one is dropped and counted instead.
+    A daemon thread wakes every ``flush_interval`` seconds, formats the
+    waiting records as JSON lines and writes them in batches to stdout (path
+    ``-``) or to a file rotated at ``max_bytes``, keeping ``backups`` old copies.
+
+    The ``q`` parameter is logged only as a hash of its normalized form, so
+    identical searches can be grouped without storing what users typed.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, path: str, max_queue: int, flush_interval: float, max_bytes: int, backups: int):
+        self.path = path
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        self._queue: deque = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[io.BufferedWriter] = None
+        self._size = 0
+
+    def record(self, entry: tuple) -> None:
+        """
+        Queue a record without blocking.
+
+        Args:
+            entry: ``(timestamp, method, route, status, latency, size, query_string, cache, upstream)``
+        """
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(entry)
+
+    def start(self) -> None:
+        """Open the log file, if any, and start the writer thread."""
+        if self.path != "-":
+            # Resolved here rather than at import so each worker process gets its own file
+            self.path = self.path.replace("{pid}", str(os.getpid()))
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the writer thread after it has written every queued record."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> None:
+        queue = self._queue
+        while queue:
+            lines = [self._format(queue.popleft()) for _ in range(min(len(queue), self.BATCH_SIZE))]
+            try:
+                self._write(b"".join(lines))
+            except OSError:
+                self.write_errors += len(lines)
+            else:
+                self.written += len(lines)
+
+    @staticmethod
+    def _format(entry: tuple) -> bytes:
+        timestamp, method, route, status, latency, size, query_string, cache, upstream_status = entry
+        query_hash = None
+        if b"q=" in query_string:
+            q = dict(parse_qsl(query_string.decode("latin-1"))).get("q")
+            if q is not None:
+                query_hash = hashlib.sha256(normalize_query(q).encode("utf-8")).hexdigest()[:16]
+        return json_dumps({
+            "time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="milliseconds"),
+            "method": method,
+            "route": route,
+            "status": status,
+            "latency_ms": round(latency * 1000, 3),
+            "bytes": size,
+            "query_hash": query_hash,
+            "cache": cache,
+            "upstream_status": upstream_status,
+        }) + b"\n"
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+            return
+        if self.max_bytes > 0 and self._size > 0 and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "wb")
+        self._size = 0
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag with a background ticker.
+
+    Every ``interval`` seconds the ticker records how much later than
+    requested its sleep returned. A busy or blocked loop delays every request
+    by about that much. The last ``window`` samples are kept.
+    """
+
+    def __init__(self, interval: float, window: int = 10):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(loop.time() - started - self.interval, 0.0))
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            dict: Lag of the latest sample and the maximum over the window, in seconds
+        """
+        if not self._samples:
+            return {"seconds": 0.0, "max_seconds": 0.0}
+        return {"seconds": self._samples[-1], "max_seconds": max(self._samples)}
+
+
+class UpstreamProbe:
+    """
+    Periodically calls a cheap upstream endpoint and caches the outcome.
+
+    Readiness checks read the cached result, so however often the load
+    balancer polls, Deezer sees one probe per ``interval`` per worker. The
+    probe should bypass the circuit breaker and quota governor, so it
+    reports Deezer itself rather than this worker's view of it.
+    """
+
+    def __init__(self, probe: Callable[[], Awaitable[httpx.Response]], interval: float):
+        self.probe = probe
+        self.interval = interval
+        self.ok: Optional[bool] = None
+        self.status: Optional[int] = None
+        self.latency = 0.0
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    async def check(self) -> None:
+        started = time.monotonic()
+        try:
+            response = await self.probe()
+        except httpx.RequestError as e:
+            self.ok, self.status, self.error = False, None, f"{type(e).__name__}: {e}"
+        else:
+            self.status = response.status_code
+            self.ok = self.status < 500 and self.status != 429
+            self.error = None if self.ok else f"Deezer API returned {self.status}"
+        self.latency = time.monotonic() - started
+        self.checked_at = time.monotonic()
+
+    async def run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the latest probe.
+
+        A result older than three intervals is reported as failed, since the
+        probe task has evidently stopped. Before the first probe completes,
+        ``ok`` is None.
+        """
+        age = None if self.checked_at is None else time.monotonic() - self.checked_at
+        ok = self.ok
+        error = self.error
+        if age is not None and age > 3 * self.interval:
+            ok, error = False, "probe result is stale"
+        return {
+            "ok": ok,
+            "status": self.status,
+            "latency_seconds": self.latency,
+            "age_seconds": age,
+            "error": error,
+        }
+
+
+class DiskCache:
+    """
+    Size-bounded directory of immutable cached files.
+
+    Files are written to a temporary name and renamed into place, so readers
+    (including other worker processes) never see partial files. The least
+    recently used files are deleted once the total size exceeds ``max_bytes``.
+    Usage is tracked per process, so with several workers the bound is
+    approximate.
+    """
+
+    _temp_ids = itertools.count()
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self.total_bytes += size
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the path of a cached file and mark it recently used, or None."""
+        path = self.path(name)
+        if not os.path.exists(path):
+            if name in self._files:
+                self.total_bytes -= self._files.pop(name)
+            return None
+        if name in self._files:
+            self._files.move_to_end(name)
+        else:
+            # Written by another worker process
+            size = os.path.getsize(path)
+            self._files[name] = size
+            self.total_bytes += size
+        return path
+
+    def temp_path(self, name: str) -> str:
+        """Return a unique temporary path in the cache directory for writing ``name``."""
+        return self.path(f".{name}.{os.getpid()}.{next(self._temp_ids)}.tmp")
+
+    def adopt(self, name: str, temp_path: str) -> str:
+        """Atomically move a fully written temporary file into the cache."""
+        final = self.path(name)
+        os.replace(temp_path, final)
+        size = os.path.getsize(final)
+        self.total_bytes += size - self._files.pop(name, 0)
+        self._files[name] = size
+        self._evict()
+        return final
+
+    def put(self, name: str, data: bytes) -> str:
+        """Atomically write ``data`` as ``name`` and return its path."""
+        temp = self.temp_path(name)
+        with open(temp, "wb") as f:
+            f.write(data)
+        return self.adopt(name, temp)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                pass
+
+
+class PreviewDownload:
+    """
+    One in-progress download of a preview file into the disk cache.
+
+    The file is written to a temporary path that readers can follow while it
+    grows; once complete it is renamed into the cache. Readers wait on
+    ``wait_for`` for more bytes, so any number of concurrent clients share a
+    single upstream transfer. The download runs as its own task and is not
+    affected by clients disconnecting.
+    """
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.temp_path = preview_cache.temp_path(name)
+        self.size: Optional[int] = None
+        self.written = 0
+        self.done = False
+        self.error: Optional[HTTPException] = None
+        self.started = asyncio.Event()
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for(self, offset: int) -> None:
+        """Wait until more than ``offset`` bytes are written or the download ends."""
+        while not self.done and self.written <= offset:
+            await self._changed.wait()
+
+    async def run(self) -> str:
+        """Download the file and return its cached path."""
+        started = time.monotonic()
+        status = "error"
+        metrics.upstream_in_flight += 1
+        try:
+            with open(self.temp_path, "wb") as f:
+                async with upstream.client.stream("GET", self.url) as response:
+                    status = str(response.status_code)
+                    if response.status_code != 200:
+                        raise HTTPException(
+                            status_code=404 if response.status_code in (403, 404) else 502,
+                            detail=f"Preview source returned status {response.status_code}"
+                        )
+                    length = response.headers.get("content-length")
+                    self.size = int(length) if length and length.isdigit() else None
+                    self.started.set()
+                    async for chunk in response.aiter_bytes(PREVIEW_CHUNK_SIZE):
+                        # Writes go to the page cache and are small, so they are not offloaded
+                        f.write(chunk)
+                        f.flush()
+                        self.written += len(chunk)
+                        self._notify()
+            path = preview_cache.adopt(self.name, self.temp_path)
+            self.size = self.written
+            return path
+        except httpx.RequestError as e:
+            self.error = HTTPException(status_code=502, detail=f"Failed to fetch preview: {str(e)}")
+            raise self.error
+        except HTTPException as e:
+            self.error = e
+            raise
+        finally:
+            self.done = True
+            self.started.set()
+            self._notify()
+            metrics.upstream_in_flight -= 1
+            metrics.observe_upstream("preview", status, time.monotonic() - started)
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header.
+
+    Args:
+        header: Raw header value, or None
+        size: Total size of the resource in bytes
+
+    Returns:
+        tuple: Inclusive ``(start, end)`` offsets, or None to send the whole
+        resource (no header, or a form that is ignored such as multiple ranges)
+
+    Raises:
+        HTTPException: 416 if the range cannot be satisfied
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[6:].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            start, end = max(size - int(end_text), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def resize_image(data: bytes, size: int, fmt: str) -> bytes:
+    """
+    Scale an image to fit within ``size`` x ``size`` pixels and re-encode it.
+
+    Runs in a worker process of the image pool.
+
+    Args:
+        data: Source image bytes
+        size: Maximum width and height in pixels
+        fmt: ``"webp"`` or ``"jpeg"``
+
+    Returns:
+        bytes: The encoded image
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        image.thumbnail((size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        if fmt == "webp":
+            image.save(output, format="WEBP", quality=80, method=4)
+        else:
+            image.save(output, format="JPEG", quality=82, optimize=True, progressive=True)
+        return output.getvalue()
+
+
+class PrefixIndex:
+    """
+    In-memory typeahead index over normalized terms, ranked by popularity.
+
+    Terms are kept in a sorted list keyed by the whole term and by the suffix
+    starting at each of its first words, so ``"pu"`` finds ``"daft punk"``.
+    A lookup is a bisect plus a scan of at most ``scan_limit`` entries. Short
+    prefixes match too many entries for that scan to reach the popular ones,
+    so for prefixes of up to ``SHORT_PREFIX`` characters the ``TOP_K`` most
+    popular terms are kept ready, updated as scores grow. When the index
+    holds more than ``max_terms`` terms, the least popular are dropped.
+    """
+
+    MAX_TERM_LENGTH = 100
+    MAX_WORD_KEYS = 4
+    SHORT_PREFIX = 3
+    TOP_K = 20
+
+    def __init__(self, max_terms: int, scan_limit: int):
+        self.max_terms = max_terms
+        self.scan_limit = scan_limit
+        self._entries: List[Tuple[str, str]] = []
+        # term -> [display text, type, score]
+        self._terms: Dict[str, list] = {}
+        # short prefix -> up to TOP_K terms, most popular first
+        self._top: Dict[str, List[str]] = {}
+
+    def _keys(self, term: str) -> set:
+        words = term.split(" ")
+        return {" ".join(words[i:]) for i in range(min(len(words), self.MAX_WORD_KEYS))}
+
+    def _short_prefixes(self, keys: set) -> set:
+        return {key[:length] for key in keys for length in range(1, min(len(key), self.SHORT_PREFIX) + 1)}
+
+    def _update_top(self, term: str, keys: set) -> None:
+        # Scores only grow, so a term outside a full list can only enter it when its own score rises
+        terms = self._terms
+        score = terms[term][2]
+        for prefix in self._short_prefixes(keys):
+            top = self._top.get(prefix)
+            if top is None:
+                self._top[prefix] = [term]
+                continue
+            if term in top:
+                top.remove(term)
+            elif len(top) >= self.TOP_K:
+                if terms[top[-1]][2] >= score:
+                    continue
+                top.pop()
+            position = len(top)
+            while position and terms[top[position - 1]][2] < score:
+                position -= 1
+            top.insert(position, term)
+
+    def add(self, text: str, kind: str, weight: float = 1.0) -> None:
+        """Add a term or raise its popularity."""
+        term = normalize_query(text)
+        if not term or len(term) > self.MAX_TERM_LENGTH:
+            return
+        entry = self._terms.get(term)
+        if entry is not None:
+            entry[2] += weight
+            self._update_top(term, self._keys(term))
+            return
+        self._terms[term] = [" ".join(text.split()), kind, weight]
+        keys = self._keys(term)
+        for key in keys:
+            insort(self._entries, (key, term))
+        self._update_top(term, keys)
+        if len(self._terms) > self.max_terms:
+            self._prune()
+
+    def _prune(self) -> None:
+        keep = sorted(self._terms, key=lambda term: self._terms[term][2], reverse=True)[:self.max_terms * 9 // 10]
+        self._terms = {term: self._terms[term] for term in keep}
+        self._entries = sorted((key, term) for term in self._terms for key in self._keys(term))
+        # Rebuilt in descending score order, so each list fills with its most popular terms
+        self._top = {}
+        for term in keep:
+            for prefix in self._short_prefixes(self._keys(term)):
+                top = self._top.setdefault(prefix, [])
+                if len(top) < self.TOP_K:
+                    top.append(term)
+
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, str]]:
+        """
+        Return the most popular terms matching a prefix.
+
+        Returns:
+            list: ``{"text": ..., "type": ...}`` dicts, most popular first
+        """
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= self.SHORT_PREFIX and limit <= self.TOP_K:
+            best = self._top.get(prefix, [])[:limit]
+            return [{"text": self._terms[term][0], "type": self._terms[term][1]} for term in best]
+        entries = self._entries
+        position = bisect_left(entries, (prefix,))
+        end = min(position + self.scan_limit, len(entries))
+        matches = set()
+        while position < end:
+            key, term = entries[position]
+            if not key.startswith(prefix):
+                break
+            matches.add(term)
+            position += 1
+        best = heapq.nlargest(limit, matches, key=lambda term: self._terms[term][2])
+        return [{"text": self._terms[term][0], "type": self._terms[term][1]} for term in best]
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+class TrackIndex:
+    """
+    In-memory inverted index over every track seen in Deezer search results.
+
+    Track titles, artist names and album titles are tokenized into postings
+    lists of integer document ids stored in ``array('I')``; only a compact
+    projection of each track is kept. Queries are ranked with BM25 (using
+    term presence, since these fields rarely repeat a word). When more than
+    ``max_tracks`` tracks are indexed, the oldest tenth is dropped and the
+    postings are rebuilt.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, max_tracks: int, fields: str):
+        self.max_tracks = max_tracks
+        self.fields = fields
+        self._next_id = 0
+        # doc id -> (compact track, token count); insertion ordered, oldest first
+        self._docs: Dict[int, Tuple[Dict[str, Any], int]] = {}
+        self._doc_ids: Dict[Any, int] = {}
+        self._postings: Dict[str, array.array] = {}
+        self._total_length = 0
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return cls.TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).casefold())
+
+    def _track_tokens(self, track: Dict[str, Any]) -> List[str]:
+        artist = track.get("artist") if isinstance(track.get("artist"), dict) else {}
+        album = track.get("album") if isinstance(track.get("album"), dict) else {}
+        texts = (track.get("title"), artist.get("name"), album.get("title"))
+        return [token for text in texts if isinstance(text, str) for token in self.tokenize(text)]
+
+    def add(self, track: Any) -> None:
+        """Index one Deezer track; tracks already indexed are skipped."""
+        if not isinstance(track, dict) or "id" not in track or track["id"] in self._doc_ids:
+            return
+        tokens = self._track_tokens(track)
+        if not tokens:
+            return
+        doc_id = self._next_id
+        self._next_id += 1
+        compact = project(track, compile_fields(self.fields))
+        if isinstance(track.get("album"), dict) and "title" in track["album"]:
+            compact.setdefault("album", {})["title"] = track["album"]["title"]
+        self._docs[doc_id] = (compact, len(tokens))
+        self._doc_ids[track["id"]] = doc_id
+        self._total_length += len(tokens)
+        for token in set(tokens):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array.array("I")
+            postings.append(doc_id)
+        if len(self._docs) > self.max_tracks:
+            self._evict()
+
+    def add_result(self, result: Dict[str, Any]) -> None:
+        for track in result.get("data", ()):
+            self.add(track)
+
+    def _evict(self) -> None:
+        drop = max(len(self._docs) // 10, 1)
+        for doc_id in list(itertools.islice(self._docs, drop)):
+            track, length = self._docs.pop(doc_id)
+            self._doc_ids.pop(track.get("id"), None)
+            self._total_length -= length
+        postings: Dict[str, array.array] = {}
+        for doc_id, (track, _) in self._docs.items():
+            for token in set(self._track_tokens(track)):
+                postings.setdefault(token, array.array("I")).append(doc_id)
+        self._postings = postings
+
+    def search(self, query: str, index: int = 0, limit: int = DEEZER_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Rank indexed tracks against a query with BM25.
+
+        Returns:
+            dict: A Deezer-shaped result page with ``"source": "local"``
+        """
+        docs = self._docs
+        if not docs:
+            return {"data": [], "total": 0, "source": "local"}
+        average_length = self._total_length / len(docs)
+        scores: Dict[int, float] = {}
+        for token in set(self.tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id in postings:
+                length = docs[doc_id][1]
+                norm = self.K1 * (1 - self.B + self.B * length / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (self.K1 + 1) / (1 + norm)
+        ranked = heapq.nlargest(index + limit, scores, key=scores.__getitem__)[index:]
+        return {"data": [docs[doc_id][0] for doc_id in ranked], "total": len(scores), "source": "local"}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+
+class QueryPopularity:
+    """
+    Exponentially decayed search counts, used to choose queries to pre-warm.
+
+    Uses forward decay: a search at time ``t`` adds ``2 ** (t / half_life)``,
+    so older scores never need rewriting and ranking is a plain sort. Scores
+    are kept as base-2 logarithms to stay finite. Searches are counted in
+    memory; ``flush()`` merges them into the shared store so every worker,
+    and the next process after a restart, ranks queries by combined traffic.
+    """
+
+    def __init__(self, half_life: float, max_entries: int, store: Optional[SharedSearchStore]):
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self.store = store
+        self._scores: Dict[str, float] = {}
+        self._pending: Dict[str, float] = {}
+
+    def hit(self, query: str) -> None:
+        """Count one search for a normalized query."""
+        weight = time.time() / self.half_life
+        self._scores[query] = log2_add(self._scores.get(query), weight)
+        if self.store is not None:
+            self._pending[query] = log2_add(self._pending.get(query), weight)
+        if len(self._scores) > self.max_entries + self.max_entries // 10:
+            keep = heapq.nlargest(self.max_entries, self._scores, key=self._scores.__getitem__)
+            self._scores = {query: self._scores[query] for query in keep}
+            self._pending = {query: self._pending[query] for query in keep if query in self._pending}
+
+    def flush(self) -> None:
+        """Merge searches counted since the last flush into the shared store."""
+        if self.store is not None and self._pending:
+            pending, self._pending = self._pending, {}
+            self.store.add_popularity(pending)
+
+    def top(self, n: int) -> List[str]:
+        """
+        Return the ``n`` most popular queries, from the shared store when there is one.
+
+        Searches flushed here are merged by the store's writer thread, so they
+        count from the next call on rather than necessarily this one.
+        """
+        if self.store is not None:
+            self.flush()
+            return self.store.popular_queries(n)
+        return heapq.nlargest(n, self._scores, key=self._scores.__getitem__)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+search_cache = SearchCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL)
+shared_store = (
+    SharedSearchStore(SHARED_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL, SHARED_CACHE_MAX_ENTRIES)
+    if SHARED_CACHE_PATH else None
+)
+upstream = UpstreamClient(
+    DEEZER_API_URL,
+    limits=httpx.Limits(
+        max_connections=UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+        keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY
+    ),
+    timeout=httpx.Timeout(
+        connect=UPSTREAM_CONNECT_TIMEOUT,
+        read=UPSTREAM_READ_TIMEOUT,
+        write=UPSTREAM_WRITE_TIMEOUT,
+        pool=UPSTREAM_POOL_TIMEOUT
+    ),
+    http2=UPSTREAM_HTTP2,
+    warmup_connections=UPSTREAM_WARMUP_CONNECTIONS
+)
+governor = TokenBucketGovernor(UPSTREAM_RATE_LIMIT, UPSTREAM_BURST, UPSTREAM_QUEUE_SIZE)
+breaker = CircuitBreaker(
+    BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATIO, BREAKER_SLOW_CALL_SECONDS, BREAKER_OPEN_SECONDS
+)
+hedging = HedgingPolicy(HEDGE_PERCENTILE, HEDGE_BUDGET, HEDGE_WINDOW, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY)
+metrics = Metrics()
+image_cache = DiskCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES) if IMAGE_PROXY_ENABLED else None
+image_flight = SingleFlight()
+preview_cache = DiskCache(PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES) if PREVIEW_PROXY_ENABLED else None
+preview_downloads: Dict[str, PreviewDownload] = {}
+# Preview URLs of tracks seen in search results, by track id
+preview_urls: "OrderedDict[int, str]" = OrderedDict()
+# Upstream Content-Type of original images fetched by this process, by cache name
+image_types: "OrderedDict[str, str]" = OrderedDict()
+suggest_index = PrefixIndex(SUGGEST_MAX_TERMS, SUGGEST_SCAN_LIMIT)
+track_index = TrackIndex(LOCAL_INDEX_MAX_TRACKS, DEFAULT_SEARCH_FIELDS)
+query_popularity = QueryPopularity(PREWARM_HALF_LIFE, PREWARM_MAX_QUERIES, shared_store)
+prewarm_stats = {"passes": 0, "fetched": 0, "promoted": 0, "fresh": 0, "deferred": 0, "failed": 0}
+image_pool: Optional[ProcessPoolExecutor] = None
+loop_lag = LoopLagMonitor(READY_LAG_INTERVAL)
+access_log = AccessLog(
+    ACCESS_LOG, ACCESS_LOG_QUEUE_SIZE, ACCESS_LOG_FLUSH_INTERVAL, ACCESS_LOG_MAX_BYTES, ACCESS_LOG_BACKUPS
+) if ACCESS_LOG else None
+deezer_probe = UpstreamProbe(lambda: upstream.client.get(DEEZER_API_URL + "/infos"), READY_PROBE_INTERVAL)
+metrics.collectors.update({
+    "event_loop_lag_seconds": (
+        "Event loop lag measured by the readiness ticker.",
+        lambda: {"": loop_lag.stats()["seconds"]}
+    ),
+    "upstream_pool_connections": (
+        "Deezer connection pool connections, by state.",
+        lambda: {f'state="{state}"': upstream.stats()[state] for state in ("in_use", "idle")}
+    ),
+    "upstream_pool_waiting_requests": (
+        "Requests waiting for a Deezer connection.",
+        lambda: {"": upstream.stats()["waiting_requests"]}
+    ),
+    "upstream_governor_queue_depth": (
+        "Requests waiting for Deezer quota.",
+        lambda: {"": governor.stats()["queue_depth"]}
+    ),
+    "upstream_hedge_requests": (
+        "Hedge requests sent to Deezer for slow searches, and how many answered first.",
+        lambda: {'outcome="sent"': hedging.hedged, 'outcome="won"': hedging.hedge_wins}
+    ),
+    "upstream_circuit_open": (
+        "Whether the Deezer circuit breaker is open (1), half-open (0.5) or closed (0).",
+        lambda: {"": {breaker.OPEN: 1, breaker.HALF_OPEN: 0.5}.get(breaker.state, 0)}
+    ),
+    "search_cache_entries": (
+        "Queries held in the in-process search cache.",
+        lambda: {"": len(search_cache)}
+    ),
+})
+if access_log is not None:
+    metrics.collectors.update({
+        "access_log_queue_depth": (
+            "Access log records waiting for the writer thread.",
+            lambda: {"": access_log.stats()["queued"]}
+        ),
+        "access_log_dropped_records": (
+            "Access log records dropped because the queue was full.",
+            lambda: {"": access_log.dropped}
+        ),
+    })
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the access log writer, upstream HTTP client, image workers,
+    readiness monitors and pre-warming scheduler on startup and release
+    resources on shutdown.
+
+    Startup waits up to ``PREWARM_STARTUP_SECONDS`` for the first pre-warming
+    pass, so the most popular queries are cached before traffic arrives; the
+    pass carries on in the background if it takes longer.
+    """
+    global image_pool
+    if access_log is not None:
+        access_log.start()
+    await upstream.start()
+    if IMAGE_PROXY_ENABLED and Image is not None:
+        image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    background_tasks = [asyncio.create_task(loop_lag.run()), asyncio.create_task(deezer_probe.run())]
+    if PREWARM_ENABLED:
+        first_pass = asyncio.get_running_loop().create_future()
+        prewarm_task = asyncio.create_task(prewarm_loop(first_pass))
+        background_tasks.append(prewarm_task)
+        await asyncio.wait(
+            [first_pass, prewarm_task], timeout=PREWARM_STARTUP_SECONDS, return_when=asyncio.FIRST_COMPLETED
+        )
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        query_popularity.flush()
+        await upstream.close()
+        if image_pool is not None:
+            image_pool.shutdown(wait=False, cancel_futures=True)
+            image_pool = None
+        if shared_store is not None:
+            shared_store.close()
+        if access_log is not None:
+            access_log.close()
+
+
+app = FastAPI(
+    title="Music App API",
+    description="A minimalistic FastAPI application with health endpoint and Deezer music search",
+    version="1.0.0",
+    lifespan=lifespan
+)
+app.add_middleware(MetricsMiddleware)
+if SERVER_TIMING_SAMPLE_RATE > 0 or SERVER_TIMING_OPT_IN:
+    app.add_middleware(ServerTimingMiddleware, sample_rate=SERVER_TIMING_SAMPLE_RATE, opt_in=SERVER_TIMING_OPT_IN)
+search_flight = SingleFlight(cancel_abandoned=True)
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected) -> Response:
+    # Nobody reads this response; 499 (nginx's "client closed request") keeps it apart in metrics
+    return Response(status_code=499)
+
+
+@lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: str, available: Tuple[str, ...]) -> str:
+    """
+    Pick the best content coding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Raw header value
+        available: Codings to choose from, in order of preference
+
+    Returns:
+        str: One of ``available``, or ``"identity"``
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    for coding in available:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+def if_none_match_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` header against an entity-tag.
+
+    Uses the weak comparison the header calls for: a ``W/`` prefix is ignored,
+    but the opaque tags must otherwise be equal.
+
+    Args:
+        if_none_match: Raw header value, possibly empty
+        etag: Quoted entity-tag of the representation being served
+
+    Returns:
+        bool: True if the header is ``*`` or lists ``etag``
+    """
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class PrecompressedAsset:
+    """
+    A static response body encoded and compressed once at startup.
+
+    Holds identity, gzip and (if available) brotli variants with a strong,
+    content-hash ETag per variant, so serving a request is a dictionary lookup.
+    """
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body, quality=11)
+        self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        self.encodings = tuple(coding for coding in ("br", "gzip") if coding in self.variants)
+
+    def etag(self, coding: str) -> str:
+        return f'"{self.digest}"' if coding == "identity" else f'"{self.digest}-{coding}"'
+
+    def response(self, request: Request) -> Response:
+        """Build the response for a request, answering 304 if the client's copy is current."""
+        coding = choose_encoding(request.headers.get("accept-encoding", ""), self.encodings)
+        headers = {
+            "ETag": self.etag(coding),
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if if_none_match_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=self.variants[coding], media_type=self.media_type, headers=headers)
+
+
+# Psychedelic music search interface served at "/"
+ROOT_HTML = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>crazy musix explorer</title>
+        <link rel="stylesheet" href="/static/app.css">
+        <script src="/static/app.js" defer></script>
     </head>
     <body>
         <div class="black-hole-overlay"></div>
@@ -1244,6 +2205,7 @@ async def root():
         
         <button class="help-btn" onclick="toggleHelp()">?</button>
         <button class="info-btn" onclick="toggleInfo()">🤖</button>
+        <button class="power-btn" id="powerBtn" onclick="togglePowerMode()">⚙️</button>
         <button class="magic-button" onclick="triggerMagic()">🌀 MAGISCHE REISE 🦄</button>
         
         <div class="help-modal" id="helpModal">
@@ -1323,9 +2285,15 @@ async def root():
                         type="text"
                         id="searchInput"
                         placeholder="Suche nach Songs, Künstlern, Alben..."
+                        list="suggestions"
+                        autocomplete="off"
                         required
                     >
+                    <datalist id="suggestions"></datalist>
                     <button type="submit" id="searchBtn">🔍 SUCHEN</button>
+                    <label class="live-toggle" title="Ergebnisse schon beim Tippen anzeigen">
+                        <input type="checkbox" id="liveSearch"> ⚡ Live-Suche
+                    </label>
                 </form>
             </div>
             
@@ -1340,252 +2308,348 @@ async def root():
             
             <div class="results" id="results"></div>
         </div>
-        
-        <script>
-            function toggleHelp() {
-                const modal = document.getElementById('helpModal');
-                modal.classList.toggle('active');
-            }
-            
-            function toggleInfo() {
-                const modal = document.getElementById('infoModal');
-                modal.classList.toggle('active');
-            }
-            
-            
-            
-            async function searchMusic(event) {
-                event.preventDefault();
-                
-                const query = document.getElementById('searchInput').value.trim();
-                const loading = document.getElementById('loading');
-                const error = document.getElementById('error');
-                const results = document.getElementById('results');
-                
-                // Reset UI
-                loading.classList.add('active');
-                error.classList.remove('active');
-                results.innerHTML = '';
-                
-                try {
-                    const response = await fetch('/api/search?q=' + encodeURIComponent(query));
-                    
-                    if (!response.ok) {
-                        throw new Error('Search failed: ' + response.statusText);
-                    }
-                    
-                    const data = await response.json();
-                    
-                    loading.classList.remove('active');
-                    
-                    if (!data.data || data.data.length === 0) {
-                        showError('No results found. Try a different search term!');
-                        return;
-                    }
-                    
-                    displayResults(data.data);
-                    
-                } catch (err) {
-                    loading.classList.remove('active');
-                    showError('Oops! Something went wrong: ' + err.message);
-                }
-            }
-            
-            let currentAudio = null;
-            let currentPlayBtn = null;
-            
-            function displayResults(tracks) {
-                const results = document.getElementById('results');
-                results.innerHTML = '';
-                
-                tracks.forEach((track, index) => {
-                    const card = document.createElement('div');
-                    card.className = 'result-card';
-                    card.style.animationDelay = index * 0.1 + 's';
-                    
-                    const artistImage = track.artist.picture_big || track.artist.picture_medium || track.album.cover_big;
-                    const previewUrl = track.preview;
-                    
-                    card.innerHTML = `
-                        <img src="${artistImage}" alt="${track.artist.name}" onerror="this.src='data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 width=%22280%22 height=%22280%22%3E%3Crect fill=%22%23667eea%22 width=%22280%22 height=%22280%22/%3E%3Ctext fill=%22white%22 x=%2250%25%22 y=%2250%25%22 text-anchor=%22middle%22 dy=%22.3em%22 font-size=%2240%22%3E🎵%3C/text%3E%3C/svg%3E'">
-                        <div class="result-info">
-                            <div class="result-title">${escapeHtml(track.title)}</div>
-                            <div class="result-artist">${escapeHtml(track.artist.name)}</div>
-                        </div>
-                        ${previewUrl ? `
-                        <div class="audio-controls">
-                            <button class="play-btn" data-preview="${previewUrl}" data-index="${index}">
-                                ▶️
-                            </button>
-                            <div class="audio-progress">
-                                <div class="audio-progress-bar" id="progress-${index}"></div>
-                            </div>
-                            <div class="audio-time" id="time-${index}">0:00</div>
-                        </div>
-                        ` : '<div class="audio-controls"><div style="color: #ff6b6b; text-align: center; width: 100%;">No preview available</div></div>'}
-                    `;
-                    
-                    results.appendChild(card);
-                    
-                    // Add event listener for play button
-                    if (previewUrl) {
-                        const playBtn = card.querySelector('.play-btn');
-                        playBtn.addEventListener('click', (e) => {
-                            e.stopPropagation();
-                            toggleAudio(previewUrl, playBtn, index);
-                        });
-                    }
-                });
-            }
-            
-            function toggleAudio(previewUrl, playBtn, index) {
-                // If clicking the same button, toggle play/pause
-                if (currentAudio && currentPlayBtn === playBtn) {
-                    if (currentAudio.paused) {
-                        currentAudio.play();
-                        playBtn.textContent = '⏸️';
-                        playBtn.classList.add('playing');
-                    } else {
-                        currentAudio.pause();
-                        playBtn.textContent = '▶️';
-                        playBtn.classList.remove('playing');
-                    }
-                    return;
-                }
-                
-                // Stop current audio if playing
-                if (currentAudio) {
-                    currentAudio.pause();
-                    currentAudio.currentTime = 0;
-                    if (currentPlayBtn) {
-                        currentPlayBtn.textContent = '▶️';
-                        currentPlayBtn.classList.remove('playing');
-                    }
-                }
-                
-                // Create and play new audio
-                currentAudio = new Audio(previewUrl);
-                currentPlayBtn = playBtn;
-                
-                currentAudio.play();
-                playBtn.textContent = '⏸️';
-                playBtn.classList.add('playing');
-                
-                // Update progress bar and time
-                currentAudio.addEventListener('timeupdate', () => {
-                    const progress = (currentAudio.currentTime / currentAudio.duration) * 100;
-                    const progressBar = document.getElementById('progress-' + index);
-                    const timeDisplay = document.getElementById('time-' + index);
-                    
-                    if (progressBar) {
-                        progressBar.style.width = progress + '%';
-                    }
-                    
-                    if (timeDisplay) {
-                        const currentTime = Math.floor(currentAudio.currentTime);
-                        const minutes = Math.floor(currentTime / 60);
-                        const seconds = currentTime % 60;
-                        timeDisplay.textContent = minutes + ':' + seconds.toString().padStart(2, '0');
-                    }
-                });
-                
-                // Reset when audio ends
-                currentAudio.addEventListener('ended', () => {
-                    playBtn.textContent = '▶️';
-                    playBtn.classList.remove('playing');
-                    const progressBar = document.getElementById('progress-' + index);
-                    const timeDisplay = document.getElementById('time-' + index);
-                    if (progressBar) progressBar.style.width = '0%';
-                    if (timeDisplay) timeDisplay.textContent = '0:00';
-                    currentAudio = null;
-                    currentPlayBtn = null;
-                });
-                
-                // Handle errors
-                currentAudio.addEventListener('error', () => {
-                    playBtn.textContent = '❌';
-                    playBtn.classList.remove('playing');
-                    playBtn.disabled = true;
-                    showError('Failed to load audio preview');
-                });
-            }
-            
-            function showError(message) {
-                const error = document.getElementById('error');
-                const errorText = document.getElementById('errorText');
-                errorText.textContent = message;
-                error.classList.add('active');
-            }
-            
-            function escapeHtml(text) {
-                const div = document.createElement('div');
-                div.textContent = text;
-                return div.innerHTML;
-            }
-            
-            // Close help modal when clicking outside
-            document.getElementById('helpModal').addEventListener('click', function(e) {
-                if (e.target === this) {
-                    toggleHelp();
-                }
-            });
-            
-            // Close info modal when clicking outside
-            document.getElementById('infoModal').addEventListener('click', function(e) {
-                if (e.target === this) {
-                    toggleInfo();
-                }
-            });
-            
-            function triggerMagic() {
-                const body = document.body;
-                
-                // Phase 1: Black hole sucks everything in
-                body.classList.add('black-hole-active');
-                
-                // Phase 2: After 2 seconds, remove black hole and add unicorn
-                setTimeout(() => {
-                    body.classList.remove('black-hole-active');
-                    body.classList.add('unicorn-return');
-                }, 2000);
-                
-                // Phase 3: After 4 seconds total, remove unicorn class
-                setTimeout(() => {
-                    body.classList.remove('unicorn-return');
-                }, 4000);
-            }
-        </script>
     </body>
     </html>
     """
-    return html_content
 
+def load_static_assets(directory: str) -> Tuple[Dict[str, PrecompressedAsset], Dict[str, str]]:
+    """
+    Load the frontend files and name each after its content hash.
+
+    Returns:
+        tuple: Assets keyed by fingerprinted name (e.g. ``app.3f2a9c1d04be.css``),
+        and the URL of each file keyed by its plain name
+    """
+    assets = {}
+    urls = {}
+    for filename, media_type in STATIC_FILES.items():
+        with open(os.path.join(directory, filename), "rb") as f:
+            asset = PrecompressedAsset(f.read(), media_type, STATIC_CACHE_CONTROL)
+        stem, extension = os.path.splitext(filename)
+        name = f"{stem}.{asset.digest[:12]}{extension}"
+        assets[name] = asset
+        urls[filename] = f"/static/{name}"
+    return assets, urls
+
+
+static_assets, static_urls = load_static_assets(STATIC_DIR)
+for filename, url in static_urls.items():
+    ROOT_HTML = ROOT_HTML.replace(f"/static/{filename}", url)
+root_page = PrecompressedAsset(ROOT_HTML.encode("utf-8"), "text/html; charset=utf-8", ROOT_CACHE_CONTROL)
+
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    """
+    Root endpoint that returns a psychedelic music search interface.
+
+    The page is encoded and compressed once at startup; the variant matching
+    the client's ``Accept-Encoding`` is served with a strong ETag, and
+    ``If-None-Match`` revalidation is answered with 304 Not Modified.
+    
+    Returns:
+        HTMLResponse: An interactive music search page
+    """
+    return root_page.response(request)
+
+
+@app.get("/static/{name}")
+async def static_file(name: str, request: Request):
+    """
+    Serve a fingerprinted frontend asset.
+
+    Names change whenever the content does, so responses are cacheable
+    forever (``immutable``); brotli and gzip variants are prepared at startup.
+
+    Args:
+        name: Fingerprinted file name, as referenced by the root page
+
+    Raises:
+        HTTPException: 404 for unknown names, including outdated fingerprints
+    """
+    asset = static_assets.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return asset.response(request)
+
+
+@lru_cache(maxsize=128)
+def compile_fields(fields: str) -> Optional[Dict[str, Any]]:
+    """
+    Compile a comma-separated list of dotted field paths into a projection spec.
+
+    ``"title,artist.name,artist.picture_*"`` becomes
+    ``{"title": None, "artist": {"name": None, "picture_*": None}}``; a
+    trailing ``*`` matches any key with that prefix. ``"*"`` selects
+    everything and compiles to None.
+    """
+    spec: Dict[str, Any] = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if path == "*":
+            return None
+        if not path:
+            continue
+        node = spec
+        *parents, leaf = path.split(".")
+        for part in parents:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        node.setdefault(leaf, None)
+    return spec
 
-@app.get("/api/search")
-async def search_music(q: str = Query(..., description="Search query for music (artist, track, album)")):
+
+def project(item: Any, spec: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the fields of ``item`` selected by a spec from ``compile_fields``."""
+    if spec is None or not isinstance(item, dict):
+        return item
+    projected = {}
+    for key, child in spec.items():
+        if key.endswith("*"):
+            prefix = key[:-1]
+            for name, value in item.items():
+                if name.startswith(prefix):
+                    projected[name] = project(value, child)
+        elif key in item:
+            projected[key] = project(item[key], child)
+    return projected
+
+
+@lru_cache(maxsize=4096)
+def proxied_image_url(url: str, size: int) -> str:
+    """Return the /api/image URL serving ``url`` resized to ``size`` pixels."""
+    return f"/api/image?url={quote(url, safe='')}&size={size}"
+
+
+def proxy_track_images(track: Any) -> Any:
     """
-    Search for music using the Deezer API.
-    
+    Point the artist picture and album cover fields of a projected track at the image proxy.
+
+    Nested objects are copied, never modified, since they may be shared with the cache.
+    """
+    if not isinstance(track, dict):
+        return track
+    for field in ("artist", "album"):
+        obj = track.get(field)
+        if not isinstance(obj, dict):
+            continue
+        rewritten = dict(obj)
+        for key, value in obj.items():
+            suffix = key.rpartition("_")[2]
+            if suffix in IMAGE_SIZES and key.startswith(("picture_", "cover_")) and isinstance(value, str) and value:
+                rewritten[key] = proxied_image_url(value, IMAGE_SIZES[suffix])
+        track[field] = rewritten
+    return track
+
+
+def project_search_result(result: Dict[str, Any], fields: str) -> Dict[str, Any]:
+    """
+    Project every track of a Deezer search result, keeping the result total.
+
+    Image and preview URLs of projected tracks point at the image and preview
+    proxies when they are enabled; ``fields=*`` returns the Deezer payload
+    untouched.
+    """
+    spec = compile_fields(fields)
+    if spec is None:
+        return result
+    tracks = []
+    for track in result.get("data", ()):
+        projected = project(track, spec)
+        if IMAGE_PROXY_ENABLED:
+            projected = proxy_track_images(projected)
+        if PREVIEW_PROXY_ENABLED and isinstance(projected, dict) and projected.get("preview") and "id" in track:
+            projected["preview"] = f"/api/preview/{track['id']}"
+        tracks.append(projected)
+    payload = {"data": tracks}
+    if "total" in result:
+        payload["total"] = result["total"]
+    for key in ("stale", "source"):
+        if key in result:
+            payload[key] = result[key]
+    return payload
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[Any]) -> Any:
+    """
+    Await a result unless the client disconnects first.
+
+    Starlette does not cancel a handler when its client goes away, so without
+    this a request abandoned by the browser (e.g. a superseded search) would
+    keep waiting on Deezer. On disconnect the awaitable is cancelled, which
+    releases its place in the quota queue or its upstream connection.
+
+    Raises:
+        ClientDisconnected: If the client disconnected before the result was ready
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait((work, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+    if work.cancelled():
+        raise ClientDisconnected()
+    return work.result()
+
+
+def _usable_response(task: "asyncio.Task") -> bool:
+    """Whether a finished request task produced a response worth returning (not an error, 5xx or 429)."""
+    if task.cancelled() or task.exception() is not None:
+        return False
+    status = task.result().status_code
+    return status < 500 and status != 429
+
+
+async def _hedged_get(url: str, params: Optional[Dict[str, Any]], trace: Optional[UpstreamTrace]) -> httpx.Response:
+    """
+    GET a Deezer URL, hedging it with a second request if it is slow.
+
+    Once the first request has run for the hedge delay, an identical one is
+    sent if the hedging budget allows it, the circuit is closed and the quota
+    governor has a token to spare right away. The first usable response wins
+    and the other request is cancelled; if both fail, the first request's
+    outcome is returned or raised.
+    """
+    hedging.start_request()
+    delay = hedging.delay()
+    started = time.monotonic()
+    primary = asyncio.ensure_future(
+        upstream.client.get(url, params=params, extensions={"trace": trace} if trace else None)
+    )
+    primary.add_done_callback(
+        lambda t: None if t.cancelled() or t.exception() is not None else hedging.observe(time.monotonic() - started)
+    )
+    hedge = None
+    try:
+        if delay is None:
+            return await primary
+        await asyncio.wait((primary,), timeout=delay)
+        if (
+            primary.done()
+            or breaker.state != breaker.CLOSED
+            or not hedging.has_budget()
+            or not governor.try_acquire()
+        ):
+            return await primary
+        hedging.spend()
+        hedge = asyncio.ensure_future(upstream.client.get(url, params=params))
+        # Keeps a failed loser's exception from being reported as never retrieved
+        hedge.add_done_callback(lambda t: t.cancelled() or t.exception())
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if hedge in done and _usable_response(hedge) and not (primary in done and _usable_response(primary)):
+                hedging.hedge_wins += 1
+                if not primary.done():
+                    # The slow request is cancelled, so record how long it had run as a lower bound
+                    hedging.observe(time.monotonic() - started)
+                add_timing("hedge", delay)
+                if trace is not None:
+                    # Phases of the abandoned request would be misleading; report the whole call instead
+                    trace.marks.clear()
+                return hedge.result()
+            if primary in done and (_usable_response(primary) or not pending):
+                return primary.result()
+        return await primary
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def fetch_deezer(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    priority: int = TokenBucketGovernor.PRIORITY_INTERACTIVE
+) -> Dict[str, Any]:
+    """
+    Call a Deezer API endpoint.
+
+    The request is rejected immediately while the circuit breaker is open,
+    and otherwise waits for a token from the quota governor. Interactive
+    requests are hedged when ``HEDGE_ENABLED`` is set.
+
     Args:
-        q: Search query string (required)
-    
+        path: API path, e.g. ``/search``
+        params: Query parameters
+        priority: Governor priority class of the request
+
     Returns:
-        dict: JSON response from Deezer API containing search results
-        
+        dict: JSON response from Deezer API
+
     Raises:
         HTTPException: If the Deezer API request fails
     """
+    endpoint = path.strip("/").split("/")[0]
     try:
-        # Make request to Deezer API
-        response = await http_client.get(
-            "https://api.deezer.com/search",
-            params={"q": q}
-        )
+        probe = breaker.before_call()
+        success = None
+        latency = 0.0
+        try:
+            add_timing("quota", await governor.acquire(priority))
+
+            # Make request to Deezer API
+            trace = UpstreamTrace() if server_timings.get() is not None else None
+            started = time.monotonic()
+            upstream_status = "error"
+            metrics.upstream_in_flight += 1
+            try:
+                if HEDGE_ENABLED and priority == TokenBucketGovernor.PRIORITY_INTERACTIVE:
+                    response = await _hedged_get(DEEZER_API_URL + path, params, trace)
+                else:
+                    response = await upstream.client.get(
+                        DEEZER_API_URL + path, params=params, extensions={"trace": trace} if trace else None
+                    )
+                upstream_status = str(response.status_code)
+                if priority == TokenBucketGovernor.PRIORITY_INTERACTIVE:
+                    note_access("upstream", upstream_status)
+                if trace is not None:
+                    for phase, seconds in trace.phases().items():
+                        add_timing(phase, seconds)
+            except httpx.RequestError:
+                success = False
+                raise
+            except asyncio.CancelledError:
+                upstream_status = "cancelled"
+                raise
+            finally:
+                latency = time.monotonic() - started
+                metrics.upstream_in_flight -= 1
+                metrics.observe_upstream(endpoint, upstream_status, latency)
+            success = response.status_code < 500 and response.status_code != 429
+        finally:
+            breaker.record(success, latency, probe)
         response.raise_for_status()
-        
+
         # Return the JSON response from Deezer
-        return response.json()
-        
+        if trace is None:
+            return response.json()
+        decode_started = time.perf_counter()
+        payload = response.json()
+        add_timing("decode", time.perf_counter() - decode_started)
+        return payload
+
+    except CircuitOpen as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Deezer API is unavailable: {str(e)}"
+        )
+    except QuotaExceeded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Deezer API quota exhausted: {str(e)}"
+        )
     except httpx.HTTPStatusError as e:
         raise HTTPException(
             status_code=e.response.status_code,
@@ -1603,10 +2667,467 @@ async def search_music(q: str = Query(..., description="Search query for music (
         )
 
 
+async def fetch_deezer_search(
+    q: str,
+    index: int = 0,
+    limit: int = DEEZER_PAGE_SIZE,
+    priority: int = TokenBucketGovernor.PRIORITY_INTERACTIVE
+) -> Dict[str, Any]:
+    """
+    Fetch one page of search results for a query from the Deezer API.
+
+    Args:
+        q: Search query string
+        index: Offset of the first result
+        limit: Number of results in the page
+        priority: Governor priority class of the request
+
+    Returns:
+        dict: JSON response from Deezer API
+
+    Raises:
+        HTTPException: If the Deezer API request fails
+    """
+    return await fetch_deezer("/search", {"q": q, "index": index, "limit": limit}, priority)
+
+
+def remember_previews(result: Dict[str, Any]) -> None:
+    """Record the preview URLs of a search result for the preview proxy."""
+    if not PREVIEW_PROXY_ENABLED:
+        return
+    for track in result.get("data", ()):
+        if isinstance(track, dict) and track.get("preview") and "id" in track:
+            preview_urls[track["id"]] = track["preview"]
+            preview_urls.move_to_end(track["id"])
+    while len(preview_urls) > PREVIEW_URLS_MAX_ENTRIES:
+        preview_urls.popitem(last=False)
+
+
+def index_suggestions(result: Dict[str, Any]) -> None:
+    """Add the track, artist and album names of a search result to the typeahead index."""
+    for track in result.get("data", ()):
+        if not isinstance(track, dict):
+            continue
+        if isinstance(track.get("title"), str):
+            suggest_index.add(track["title"], "track")
+        for kind, name_field in (("artist", "name"), ("album", "title")):
+            obj = track.get(kind)
+            if isinstance(obj, dict) and isinstance(obj.get(name_field), str):
+                suggest_index.add(obj[name_field], kind)
+
+
+def record_search_result(result: Dict[str, Any]) -> None:
+    """Feed a search result into the preview URL map and the local indexes."""
+    remember_previews(result)
+    index_suggestions(result)
+    track_index.add_result(result)
+
+
+def _cached_search(key: str) -> Optional[Tuple[Any, bool]]:
+    """
+    Look up a search key in the local cache, then in the shared store.
+
+    Returns:
+        tuple: ``(result, is_fresh)``, or None if neither cache has the key
+    """
+    cached = search_cache.get(key)
+    if cached is None and shared_store is not None:
+        shared = shared_store.get(key)
+        if shared is not None:
+            result, age = shared
+            search_cache.set(key, result, age=age)
+            record_search_result(result)
+            cached = result, age <= SEARCH_CACHE_TTL
+    return cached
+
+
+async def _load_search(
+    query: str,
+    index: int,
+    limit: int,
+    priority: int = TokenBucketGovernor.PRIORITY_INTERACTIVE,
+    max_age: float = SEARCH_CACHE_TTL
+) -> Dict[str, Any]:
+    """
+    Fetch a page of results for a normalized query from Deezer and store it in the caches.
+
+    A copy in the shared store no older than ``max_age`` seconds is used instead.
+    """
+    key = search_key(query, index, limit)
+    if shared_store is not None:
+        # Another worker may already have refreshed this page
+        shared = shared_store.get(key)
+        if shared is not None and shared[1] <= max_age:
+            search_cache.set(key, shared[0], age=shared[1])
+            return shared[0]
+    result = await fetch_deezer_search(query, index, limit, priority)
+    record_search_result(result)
+    search_cache.set(key, result)
+    if shared_store is not None:
+        shared_store.set(key, result)
+    return result
+
+
+def _last_known_good(key: str) -> Optional[Dict[str, Any]]:
+    """Return the most recent result for a key regardless of age, marked as stale."""
+    result = search_cache.peek(key)
+    if result is None and shared_store is not None:
+        shared = shared_store.get(key, allow_expired=True)
+        if shared is not None:
+            result = shared[0]
+    if result is None:
+        return None
+    return {**result, "stale": True}
+
+
+async def get_search_page(
+    query: str, index: int = 0, limit: int = DEEZER_PAGE_SIZE, detached: bool = False
+) -> Dict[str, Any]:
+    """
+    Return one page of results for a normalized query.
+
+    Serves cached pages (refreshing stale ones in the background) and
+    coalesces concurrent misses into a single upstream request. If Deezer
+    fails or the circuit is open, the last known result for the page is
+    returned with ``"stale": true`` instead.
+
+    The upstream request is normally cancelled once every caller waiting
+    for it is cancelled. With ``detached`` the request is held until it
+    finishes, so it always completes and fills the cache, even when other
+    callers that started it go away.
+
+    Raises:
+        HTTPException: If the Deezer API request fails and nothing was ever cached
+    """
+    key = search_key(query, index, limit)
+    if server_timings.get() is None:
+        cached = _cached_search(key)
+    else:
+        lookup_started = time.perf_counter()
+        cached = _cached_search(key)
+        add_timing("cache", time.perf_counter() - lookup_started)
+    if cached is not None:
+        result, is_fresh = cached
+        if not is_fresh:
+            # A failed refresh keeps the stale entry; its error is discarded
+            search_flight.start(
+                key, lambda: _load_search(query, index, limit, TokenBucketGovernor.PRIORITY_BACKGROUND)
+            )
+        note_access("cache", "hit" if is_fresh else "stale")
+        return result
+    note_access("cache", "coalesced" if key in search_flight else "miss")
+    try:
+        if detached:
+            return await asyncio.shield(search_flight.keep(key, lambda: _load_search(query, index, limit)))
+        return await search_flight.do(key, lambda: _load_search(query, index, limit))
+    except HTTPException as e:
+        fallback = _last_known_good(key) if e.status_code >= 500 else None
+        if fallback is None:
+            raise
+        note_access("cache", "fallback")
+        return fallback
+
+
+async def prewarm_search(query: str, lead: float) -> str:
+    """
+    Make sure the first page of a query stays cached for at least ``lead`` more seconds.
+
+    A copy that fresh in the shared store is promoted into this process;
+    otherwise the page is fetched from Deezer at background priority.
+
+    Returns:
+        str: ``"fresh"``, ``"promoted"`` or ``"fetched"``
+    """
+    key = search_key(query)
+    max_age = max(SEARCH_CACHE_TTL - lead, 0.0)
+    age = search_cache.age(key)
+    if age is not None and age <= max_age:
+        return "fresh"
+    if shared_store is not None:
+        shared = shared_store.get(key)
+        if shared is not None and shared[1] <= max_age:
+            search_cache.set(key, shared[0], age=shared[1])
+            record_search_result(shared[0])
+            return "promoted"
+    await search_flight.do(
+        key, lambda: _load_search(query, 0, DEEZER_PAGE_SIZE, TokenBucketGovernor.PRIORITY_BACKGROUND, max_age)
+    )
+    return "fetched"
+
+
+def _prewarm_headroom() -> bool:
+    """Whether Deezer has spare quota and a closed circuit, so pre-warming cannot delay user searches."""
+    stats = governor.stats()
+    return (
+        breaker.state == breaker.CLOSED
+        and stats["queue_depth"] == 0
+        and stats["tokens"] >= governor.burst * PREWARM_MIN_HEADROOM
+    )
+
+
+async def prewarm_loop(first_pass: Optional[asyncio.Future] = None) -> None:
+    """
+    Keep the most popular queries cached in this worker.
+
+    Every ``PREWARM_INTERVAL`` seconds (with +/-20% jitter, so workers drift
+    apart) the top ``PREWARM_TOP_N`` queries are checked, and those due to
+    expire within a jittered ``PREWARM_LEAD_SECONDS`` are refreshed. Deezer
+    fetches are spaced to at most ``PREWARM_RATE`` per second and only made
+    while the quota governor has headroom; the rest wait for the next pass.
+
+    Args:
+        first_pass: Future resolved when the first pass finishes
+    """
+    while True:
+        prewarm_stats["passes"] += 1
+        for query in query_popularity.top(PREWARM_TOP_N):
+            if not _prewarm_headroom():
+                prewarm_stats["deferred"] += 1
+                break
+            try:
+                outcome = await prewarm_search(query, PREWARM_LEAD_SECONDS * random.uniform(0.5, 1.0))
+            except (HTTPException, QuotaExceeded):
+                prewarm_stats["failed"] += 1
+                continue
+            prewarm_stats[outcome] += 1
+            if outcome == "fetched" and PREWARM_RATE > 0:
+                await asyncio.sleep(1 / PREWARM_RATE)
+        if first_pass is not None and not first_pass.done():
+            first_pass.set_result(None)
+        await asyncio.sleep(PREWARM_INTERVAL * random.uniform(0.8, 1.2))
+
+
+@app.get("/api/search")
+async def search_music(
+    request: Request,
+    q: str = Query(..., description="Search query for music (artist, track, album)"),
+    fields: str = Query(
+        DEFAULT_SEARCH_FIELDS,
+        description="Comma-separated track fields to return (dotted paths, trailing * wildcard, or * for all)"
+    ),
+    index: int = Query(0, ge=0, description="Offset of the first result"),
+    limit: int = Query(DEEZER_PAGE_SIZE, ge=1, le=DEEZER_MAX_PAGE_SIZE, description="Number of results"),
+    source: str = Query(
+        "auto",
+        pattern="^(auto|deezer|local)$",
+        description="deezer, local (index of previously seen tracks), or auto (Deezer with local fallback)"
+    )
+):
+    """
+    Search for music using the Deezer API.
+
+    Results are cached per normalized query and page, both in this process and
+    in a store shared with the other worker processes. Stale entries are served
+    immediately while being refreshed in the background, and concurrent
+    misses for the same query share a single upstream request.
+
+    Every track seen is also added to a local inverted index. ``source=local``
+    searches only that index; with ``source=auto`` it answers when Deezer is
+    unreachable and no cached result exists.
+
+    If the client disconnects while the page is being fetched, the handler
+    stops waiting for Deezer and the upstream request is cancelled unless
+    other clients are waiting for the same page.
+    
+    Args:
+        request: Incoming request, watched for client disconnects
+        q: Search query string (required)
+        fields: Track fields to include in the response
+        index: Offset of the first result
+        limit: Number of results to return
+        source: Where to search
+    
+    Returns:
+        Response: JSON search results, projected to the requested fields
+        
+    Raises:
+        HTTPException: If the Deezer API request fails
+    """
+    query = normalize_query(q)
+    if source == "local":
+        result = track_index.search(query, index, limit)
+        note_access("cache", "local")
+    else:
+        try:
+            result = await cancel_on_disconnect(request, get_search_page(query, index, limit))
+        except HTTPException as e:
+            result = track_index.search(query, index, limit) if source == "auto" and e.status_code >= 500 else None
+            if not result or not result["data"]:
+                raise
+            note_access("cache", "local")
+    if index == 0:
+        # Queries users actually run rank above names merely seen in results
+        suggest_index.add(q, "query", weight=3.0)
+        query_popularity.hit(query)
+    return json_response(project_search_result(result, fields))
+
+
+async def stream_search_pages(query: str, fields: str, index: int, limit: int, pages: int) -> AsyncIterator[bytes]:
+    """
+    Fetch several result pages concurrently and yield each as an NDJSON line.
+
+    Pages are yielded in completion order, each tagged with its ``index``. At
+    most ``SEARCH_STREAM_CONCURRENCY`` pages are fetched or buffered at once,
+    so a slow reader pauses the fetchers instead of growing memory. Pages past
+    the result total are skipped, and closing the generator (e.g. on client
+    disconnect) cancels the fetchers so no further pages are requested.
+    """
+    offsets = iter(range(index, index + pages * limit, limit))
+    queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=SEARCH_STREAM_CONCURRENCY)
+    total: Optional[int] = None
+
+    async def fetch_pages() -> None:
+        nonlocal total
+        # All fetchers share one offset iterator, so each page is taken once
+        for offset in offsets:
+            if total is not None and offset >= total:
+                return
+            try:
+                result = await get_search_page(query, offset, limit)
+                total = result.get("total", total)
+                line = {"index": offset, **project_search_result(result, fields)}
+            except HTTPException as e:
+                line = {"index": offset, "error": {"status_code": e.status_code, "detail": e.detail}}
+            await queue.put(json_dumps(line) + b"\n")
+
+    async def run() -> None:
+        try:
+            await asyncio.gather(*fetchers)
+        finally:
+            await queue.put(None)
+
+    fetchers = [asyncio.ensure_future(fetch_pages()) for _ in range(min(SEARCH_STREAM_CONCURRENCY, pages))]
+    runner = asyncio.ensure_future(run())
+    try:
+        while True:
+            line = await queue.get()
+            if line is None:
+                break
+            yield line
+    finally:
+        runner.cancel()
+        for fetcher in fetchers:
+            fetcher.cancel()
+
+
+@app.get("/api/search/stream")
+async def search_music_stream(
+    q: str = Query(..., description="Search query for music (artist, track, album)"),
+    fields: str = Query(
+        DEFAULT_SEARCH_FIELDS,
+        description="Comma-separated track fields to return (dotted paths, trailing * wildcard, or * for all)"
+    ),
+    index: int = Query(0, ge=0, description="Offset of the first result"),
+    limit: int = Query(DEEZER_PAGE_SIZE, ge=1, le=DEEZER_MAX_PAGE_SIZE, description="Number of results per page"),
+    pages: int = Query(4, ge=1, le=SEARCH_STREAM_MAX_PAGES, description="Number of pages to fetch")
+):
+    """
+    Stream several pages of search results as newline-delimited JSON.
+
+    Pages are fetched from Deezer concurrently and each one is written to the
+    client as soon as it arrives, as ``{"index": ..., "data": [...], "total": ...}``.
+    A page that fails is written as ``{"index": ..., "error": {...}}``.
+
+    Args:
+        q: Search query string (required)
+        fields: Track fields to include in each page
+        index: Offset of the first result
+        limit: Number of results per page
+        pages: Number of pages to fetch
+
+    Returns:
+        StreamingResponse: One JSON object per line, in completion order
+    """
+    return StreamingResponse(
+        stream_search_pages(normalize_query(q), fields, index, limit, pages),
+        media_type="application/x-ndjson"
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Body of a batch search request."""
+
+    queries: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_QUERIES, description="Search queries")
+    fields: str = Field(DEFAULT_SEARCH_FIELDS, description="Comma-separated track fields to return")
+    limit: int = Field(DEEZER_PAGE_SIZE, ge=1, le=DEEZER_MAX_PAGE_SIZE, description="Number of results per query")
+    deadline: float = Field(
+        BATCH_DEADLINE_SECONDS, gt=0, le=BATCH_DEADLINE_SECONDS, description="Seconds to wait for the whole batch"
+    )
+
+
+@app.post("/api/search/batch")
+async def search_music_batch(batch: BatchSearchRequest):
+    """
+    Run several searches in one request.
+
+    Queries are deduplicated by their normalized form and fetched with at
+    most ``BATCH_CONCURRENCY`` running at once. Queries still pending when the
+    deadline passes are reported as errors instead of failing the batch;
+    their fetches keep running in the background and still fill the cache.
+
+    Args:
+        batch: Queries, fields, page size and deadline
+
+    Returns:
+        Response: ``{"results": {query: {"data": ..., "total": ...} | {"error": ...}}}``
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(query: str) -> Dict[str, Any]:
+        async with semaphore:
+            # Detached, so fetches cut off by the deadline still complete and fill the cache
+            return await get_search_page(query, 0, batch.limit, detached=True)
+
+    keys = {q: normalize_query(q) for q in batch.queries}
+    tasks = {key: asyncio.ensure_future(run(key)) for key in set(keys.values())}
+    done, pending = await asyncio.wait(tasks.values(), timeout=batch.deadline)
+    for task in pending:
+        task.cancel()
+
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    for key, task in tasks.items():
+        if task in pending:
+            outcomes[key] = {"error": {"status_code": 504, "detail": "Batch deadline exceeded"}}
+        elif task.cancelled():
+            outcomes[key] = {"error": {"status_code": 503, "detail": "Search was cancelled"}}
+        elif isinstance(task.exception(), HTTPException):
+            error = task.exception()
+            outcomes[key] = {"error": {"status_code": error.status_code, "detail": error.detail}}
+        elif task.exception() is not None:
+            outcomes[key] = {"error": {"status_code": 500, "detail": f"An unexpected error occurred: {task.exception()}"}}
+        else:
+            outcomes[key] = project_search_result(task.result(), batch.fields)
+    return json_response({"results": {q: outcomes[key] for q, key in keys.items()}})
+
+
+@app.get("/api/suggest")
+async def suggest(
+    prefix: str = Query(..., max_length=100, description="Beginning of a search query"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions")
+):
+    """
+    Suggest search terms for a prefix from a local index, without calling Deezer.
+
+    The index is built from queries users have searched for and from the
+    track, artist and album names seen in search results, and ranked by how
+    often each term was seen.
+
+    Args:
+        prefix: Beginning of a search query
+        limit: Maximum number of suggestions
+
+    Returns:
+        Response: ``{"suggestions": [{"text": ..., "type": ...}]}``
+    """
+    return json_response({"suggestions": suggest_index.suggest(prefix, limit)})
+
+
 @app.get("/health")
 async def health_check():
     """
     Health check endpoint that returns the application status and current timestamp.
+
+    This is a liveness check and does no work; see ``/health/ready`` for readiness.
     
     Returns:
         dict: A dictionary containing status and timestamp in ISO 8601 format
@@ -1616,9 +3137,364 @@ async def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
-@app.on_event("shutdown")
-async def shutdown_event():
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness check for load balancers.
+
+    Reports event loop lag, requests in flight, Deezer connection pool
+    saturation and the cached result of the periodic Deezer probe. Nothing
+    here calls Deezer. Responds 503 when any check exceeds its threshold.
+
+    Returns:
+        Response: JSON with ``status`` (``ready`` or ``not_ready``) and each check
+    """
+    lag = loop_lag.stats()
+    pool = upstream.stats()
+    probe = deezer_probe.stats()
+    max_connections = pool["max_connections"] or 0
+    checks = {
+        "event_loop_lag": {**lag, "limit": READY_MAX_LOOP_LAG, "ok": lag["max_seconds"] <= READY_MAX_LOOP_LAG},
+        "in_flight": {
+            "requests": metrics.in_flight,
+            "limit": READY_MAX_IN_FLIGHT,
+            "ok": metrics.in_flight <= READY_MAX_IN_FLIGHT,
+        },
+        "upstream_pool": {
+            "in_use": pool["in_use"],
+            "max_connections": max_connections,
+            "saturation": pool["in_use"] / max_connections if max_connections else 0.0,
+            "waiting_requests": pool["waiting_requests"],
+            "limit": READY_MAX_POOL_WAITING,
+            "ok": pool["waiting_requests"] <= READY_MAX_POOL_WAITING,
+        },
+        "deezer": {**probe, "required": READY_REQUIRE_UPSTREAM},
+    }
+    ready = all(check["ok"] for name, check in checks.items() if name != "deezer")
+    if READY_REQUIRE_UPSTREAM and probe["ok"] is False:
+        ready = False
+    return json_response(
+        {
+            "status": "ready" if ready else "not_ready",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "checks": checks,
+        },
+        status_code=200 if ready else 503,
+        headers={"Cache-Control": "no-store"}
+    )
+
+
+@app.get("/api/upstream/stats")
+async def upstream_stats():
+    """
+    Report Deezer connection pool, quota governor, circuit breaker, hedging and pre-warming statistics for dashboards.
+
+    Returns:
+        dict: Pool connections and requests, governor queue depth and wait times, breaker state, hedge
+            counts and pre-warm counts
+    """
+    return {
+        **upstream.stats(),
+        "governor": governor.stats(),
+        "breaker": breaker.stats(),
+        "hedging": {**hedging.stats(), "enabled": HEDGE_ENABLED},
+        "prewarm": {**prewarm_stats, "tracked_queries": len(query_popularity)},
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Expose application metrics in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Request, upstream, pool, governor and cache metrics
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _image_name(url: str, variant: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:40] + variant
+
+
+def _cdn_url_allowed(url: str) -> bool:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    return parts.scheme in ("http", "https") and any(
+        host == allowed or host.endswith("." + allowed) for allowed in IMAGE_ALLOWED_HOSTS
+    )
+
+
+async def _fetch_image_original(url: str) -> bytes:
+    """
+    Download a source image from the Deezer CDN, caching it on disk.
+
+    Raises:
+        HTTPException: If the image cannot be fetched or is too large
+    """
+    name = _image_name(url, ".orig")
+    path = image_cache.get(name)
+    loop = asyncio.get_running_loop()
+    if path is not None:
+        return await loop.run_in_executor(None, _read_file, path)
+
+    started = time.monotonic()
+    status = "error"
+    metrics.upstream_in_flight += 1
+    try:
+        # Streamed so an oversized source is dropped before it is buffered, not after
+        async with upstream.client.stream("GET", url) as response:
+            status = str(response.status_code)
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=404 if response.status_code == 404 else 502,
+                    detail=f"Image source returned status {response.status_code}"
+                )
+            length = response.headers.get("content-length")
+            if length and length.isdigit() and int(length) > IMAGE_MAX_SOURCE_BYTES:
+                raise HTTPException(status_code=502, detail="Image source is too large")
+            chunks = []
+            received = 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > IMAGE_MAX_SOURCE_BYTES:
+                    raise HTTPException(status_code=502, detail="Image source is too large")
+                chunks.append(chunk)
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to fetch image: {str(e)}")
+    finally:
+        metrics.upstream_in_flight -= 1
+        metrics.observe_upstream("image", status, time.monotonic() - started)
+    content = b"".join(chunks)
+    if content_type.startswith("image/"):
+        image_types[name] = content_type
+        while len(image_types) > IMAGE_TYPES_MAX_ENTRIES:
+            image_types.popitem(last=False)
+    await loop.run_in_executor(None, image_cache.put, name, content)
+    return content
+
+
+def _read_file(path: str, limit: int = -1) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(limit)
+
+
+def sniff_image_type(head: bytes) -> str:
+    """Guess an image's media type from its first bytes, defaulting to JPEG."""
+    if head.startswith(b"\x89PNG"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    return "image/jpeg"
+
+
+async def _build_image_variant(url: str, name: str, size: int, fmt: str) -> str:
+    """Fetch, resize and cache one image variant, returning its path."""
+    original = await _fetch_image_original(url)
+    loop = asyncio.get_running_loop()
+    try:
+        data = await loop.run_in_executor(image_pool, resize_image, original, size, fmt)
+    except Exception:
+        raise HTTPException(status_code=502, detail="Image source could not be decoded")
+    return await loop.run_in_executor(None, image_cache.put, name, data)
+
+
+@app.get("/api/image")
+async def image_proxy(
+    request: Request,
+    url: str = Query(..., description="Deezer CDN image URL"),
+    size: int = Query(IMAGE_SIZES["big"], description="Maximum width and height in pixels: 56, 250, 320 or 1000"),
+    fmt: str = Query("auto", alias="format", pattern="^(auto|webp|jpeg)$", description="Output format")
+):
+    """
+    Serve a Deezer image resized and re-encoded, from an on-disk cache.
+
+    The source image is downloaded once; each size/format variant is produced
+    in a process pool so the event loop never blocks on image work. Only the
+    sizes in ``IMAGE_SIZES`` are accepted, so one URL has a handful of
+    variants at most. Variants are immutable for a given URL and served with
+    long-lived caching headers. ``format=auto`` picks WebP when the client
+    accepts it.
+
+    Args:
+        url: Deezer CDN image URL
+        size: Maximum width and height in pixels
+        fmt: ``auto``, ``webp`` or ``jpeg``
+
+    Returns:
+        FileResponse: The cached image variant
+
+    Raises:
+        HTTPException: If the proxy is disabled, the host or size is not allowed, or the image cannot be fetched
+    """
+    if image_cache is None:
+        raise HTTPException(status_code=404, detail="Image proxy is disabled")
+    if not _cdn_url_allowed(url):
+        raise HTTPException(status_code=400, detail="Image host is not allowed")
+    if size not in IMAGE_SIZES.values():
+        raise HTTPException(
+            status_code=400, detail=f"Image size must be one of {', '.join(map(str, sorted(IMAGE_SIZES.values())))}"
+        )
+
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL}
+    if fmt == "auto":
+        fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+        headers["Vary"] = "Accept"
+    if image_pool is None:
+        # Without Pillow the original image is served as is
+        name = _image_name(url, ".orig")
+        path = image_cache.get(name)
+        if path is None:
+            await image_flight.do(name, lambda: _fetch_image_original(url))
+            path = image_cache.path(name)
+        media_type = image_types.get(name)
+        if media_type is None:
+            # Cached by another worker or an earlier run
+            head = await asyncio.get_running_loop().run_in_executor(None, _read_file, path, 12)
+            media_type = sniff_image_type(head)
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    name = _image_name(url, f"-{size}.{fmt}")
+    path = image_cache.get(name)
+    if path is None:
+        path = await image_flight.do(name, lambda: _build_image_variant(url, name, size, fmt))
+    return FileResponse(path, media_type=f"image/{fmt}", headers=headers)
+
+
+async def _preview_source_url(track_id: int) -> str:
+    """
+    Find the Deezer preview URL of a track.
+
+    Uses the URLs recorded from search results and falls back to the Deezer
+    track API.
+
+    Raises:
+        HTTPException: If the track has no preview or the lookup fails
+    """
+    url = preview_urls.get(track_id)
+    if url is None:
+        track = await fetch_deezer(f"/track/{track_id}")
+        # Deezer reports unknown tracks with an "error" object and status 200
+        url = track.get("preview") if "error" not in track else None
+        if not url:
+            raise HTTPException(status_code=404, detail="Track has no preview")
+        preview_urls[track_id] = url
+    if not _cdn_url_allowed(url):
+        raise HTTPException(status_code=502, detail="Preview host is not allowed")
+    return url
+
+
+async def _start_preview_download(track_id: int, name: str) -> PreviewDownload:
+    """Return the running download of a preview, starting one if needed."""
+    download = preview_downloads.get(name)
+    if download is None:
+        url = await _preview_source_url(track_id)
+        # Another request may have started the download while the URL was resolved
+        download = preview_downloads.get(name)
+        if download is None:
+            download = preview_downloads[name] = PreviewDownload(name, url)
+            asyncio.ensure_future(download.run()).add_done_callback(
+                lambda task: _finish_preview_download(name, task)
+            )
+    return download
+
+
+def _finish_preview_download(name: str, task: "asyncio.Task") -> None:
+    preview_downloads.pop(name, None)
+    # Errors are reported to waiting requests through PreviewDownload.error
+    if not task.cancelled():
+        task.exception()
+
+
+async def _follow_download(
+    download: PreviewDownload, f: io.BufferedReader, start: int = 0, end: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Yield bytes ``start`` to ``end`` (inclusive, default the last) of a preview file as its download writes them."""
+    with f:
+        f.seek(start)
+        offset = start
+        while end is None or offset <= end:
+            await download.wait_for(offset)
+            available = download.written if end is None else min(download.written, end + 1)
+            chunk = f.read(available - offset)
+            if chunk:
+                offset += len(chunk)
+                yield chunk
+            elif download.done:
+                return
+
+
+async def _read_range(path: str, start: int, end: int) -> bytes:
+    def read() -> bytes:
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+    return await asyncio.get_running_loop().run_in_executor(None, read)
+
+
+@app.get("/api/preview/{track_id}")
+async def preview_proxy(request: Request, track_id: int):
     """
-    Cleanup function to close the HTTP client when the application shuts down.
+    Serve a track's 30-second preview MP3 through a disk cache.
+
+    Cached files are sent with ``FileResponse`` (zero-copy where the server
+    supports it). On a miss the upstream audio is streamed to the client while
+    it is written to the cache; concurrent first requests share one download.
+    Single byte ranges (``Range: bytes=...``) are answered with 206, on a
+    miss too as long as upstream reported the file size; otherwise a miss
+    with a range gets the whole file with 200.
+
+    Args:
+        track_id: Deezer track id
+
+    Returns:
+        Response: The preview audio, whole or the requested range
+
+    Raises:
+        HTTPException: If the proxy is disabled, the track has no preview, or the download fails
     """
-    await http_client.aclose()
\ No newline at end of file
+    if preview_cache is None:
+        raise HTTPException(status_code=404, detail="Preview proxy is disabled")
+
+    name = f"{track_id}.mp3"
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": PREVIEW_CACHE_CONTROL}
+    range_header = request.headers.get("range")
+    path = preview_cache.get(name)
+
+    if path is None:
+        download = await _start_preview_download(track_id, name)
+        await download.started.wait()
+        if download.error is not None:
+            raise download.error
+        # Without a known size a range cannot be answered, so the whole file is sent instead
+        byte_range = parse_byte_range(range_header, download.size) if download.size is not None else None
+        try:
+            f = open(download.temp_path, "rb")
+        except FileNotFoundError:
+            # The download already finished and was moved into the cache
+            f = open(preview_cache.path(name), "rb")
+        if byte_range is None:
+            if download.size is not None:
+                headers["Content-Length"] = str(download.size)
+            return StreamingResponse(_follow_download(download, f), media_type="audio/mpeg", headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{download.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _follow_download(download, f, start, end), status_code=206, media_type="audio/mpeg", headers=headers
+        )
+
+    size = os.path.getsize(path)
+    byte_range = parse_byte_range(range_header, size)
+    if byte_range is None:
+        return FileResponse(path, media_type="audio/mpeg", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if start == 0 and end == size - 1:
+        # Audio elements ask for "bytes=0-"; the whole file can still go out zero-copy
+        return FileResponse(path, status_code=206, media_type="audio/mpeg", headers=headers)
+    return Response(content=await _read_range(path, start, end), status_code=206, media_type="audio/mpeg", headers=headers)
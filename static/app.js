@@ -0,0 +1,587 @@
+function toggleHelp() {
+    const modal = document.getElementById('helpModal');
+    modal.classList.toggle('active');
+}
+
+function toggleInfo() {
+    const modal = document.getElementById('infoModal');
+    modal.classList.toggle('active');
+}
+
+// Low-power tier: html.low-power swaps filter, shadow and background
+// animations for transform/opacity ones. In "auto" mode it is switched on for
+// reduced-motion users, devices with few cores, or when frames are dropped.
+const POWER_MODES = {
+    auto: { icon: '⚙️', title: 'Energiesparmodus: automatisch' },
+    low: { icon: '🔋', title: 'Energiesparmodus: an' },
+    full: { icon: '⚡', title: 'Energiesparmodus: aus (volle Effekte)' }
+};
+const LOW_POWER_MAX_CORES = 4;
+const FRAME_SAMPLE_MS = 3000;
+const SLOW_FRAME_MS = 1000 / 40;
+const SLOW_FRAME_RATIO = 0.25;
+const reducedMotion = window.matchMedia('(prefers-reduced-motion: reduce)');
+let powerMode = POWER_MODES[localStorage.getItem('powerMode')] ? localStorage.getItem('powerMode') : 'auto';
+let framesDropped = false;
+let samplingFrames = false;
+
+function applyPowerMode() {
+    const auto = reducedMotion.matches || (navigator.hardwareConcurrency || 8) <= LOW_POWER_MAX_CORES || framesDropped;
+    const low = powerMode === 'low' || (powerMode === 'auto' && auto);
+    document.documentElement.classList.toggle('low-power', low);
+    const powerBtn = document.getElementById('powerBtn');
+    powerBtn.textContent = POWER_MODES[powerMode].icon;
+    powerBtn.title = POWER_MODES[powerMode].title + (low ? ' – aktiv' : '');
+}
+
+function togglePowerMode() {
+    const modes = Object.keys(POWER_MODES);
+    powerMode = modes[(modes.indexOf(powerMode) + 1) % modes.length];
+    localStorage.setItem('powerMode', powerMode);
+    applyPowerMode();
+    sampleFrames();
+}
+
+// Count frames slower than 40 fps for a few seconds; switch to the low-power
+// tier if too many are
+function sampleFrames() {
+    const root = document.documentElement;
+    if (powerMode !== 'auto' || samplingFrames || root.classList.contains('low-power') || document.hidden) return;
+    samplingFrames = true;
+    const started = performance.now();
+    let previous = started;
+    let frames = 0;
+    let slow = 0;
+    requestAnimationFrame(function tick(now) {
+        frames++;
+        if (now - previous > SLOW_FRAME_MS) slow++;
+        previous = now;
+        if (now - started < FRAME_SAMPLE_MS) {
+            requestAnimationFrame(tick);
+            return;
+        }
+        samplingFrames = false;
+        // Frames are not painted in background tabs, so such samples say nothing
+        if (!document.hidden && frames >= 10 && slow / frames > SLOW_FRAME_RATIO) {
+            framesDropped = true;
+            applyPowerMode();
+        }
+    });
+}
+
+// Pause the animations of elements outside the viewport
+const offscreenObserver = 'IntersectionObserver' in window ? new IntersectionObserver((entries) => {
+    entries.forEach((entry) => entry.target.classList.toggle('offscreen', !entry.isIntersecting));
+}) : null;
+
+function observeOffscreen(element) {
+    if (offscreenObserver) offscreenObserver.observe(element);
+}
+
+applyPowerMode();
+reducedMotion.addEventListener('change', applyPowerMode);
+document.querySelectorAll('.header, .search-container').forEach(observeOffscreen);
+window.addEventListener('load', sampleFrames);
+
+
+
+// Only the latest search may update the page: each new search aborts the
+// previous request, and responses from older searches are ignored
+const LIVE_SEARCH_DELAY_MS = 350;
+const LIVE_SEARCH_MIN_LENGTH = 2;
+let searchSeq = 0;
+let searchController = null;
+let liveSearchTimer = null;
+
+function searchMusic(event) {
+    event.preventDefault();
+    clearTimeout(liveSearchTimer);
+    runSearch(document.getElementById('searchInput').value.trim());
+}
+
+async function runSearch(query) {
+    const seq = ++searchSeq;
+    if (searchController) {
+        searchController.abort();
+    }
+    const controller = new AbortController();
+    searchController = controller;
+
+    const loading = document.getElementById('loading');
+    const error = document.getElementById('error');
+
+    // Reset UI
+    loading.classList.add('active');
+    error.classList.remove('active');
+    displayResults([], 0, query);
+
+    try {
+        const response = await fetch('/api/search?q=' + encodeURIComponent(query), { signal: controller.signal });
+
+        if (!response.ok) {
+            throw new Error('Search failed: ' + response.statusText);
+        }
+
+        const data = await response.json();
+        if (seq !== searchSeq) return;
+
+        loading.classList.remove('active');
+
+        if (!data.data || data.data.length === 0) {
+            showError('No results found. Try a different search term!');
+            return;
+        }
+
+        displayResults(data.data, data.total, query);
+        sampleFrames();
+
+    } catch (err) {
+        if (err.name === 'AbortError' || seq !== searchSeq) return;
+        loading.classList.remove('active');
+        showError('Oops! Something went wrong: ' + err.message);
+    } finally {
+        if (searchController === controller) {
+            searchController = null;
+        }
+    }
+}
+
+// Results are windowed: only cards near the viewport are in the DOM, and
+// padding on the grid stands in for the rows above and below. Cards leaving
+// the window go to a pool and are refilled with other tracks. Missing cards
+// are built off-document and inserted a few rows per animation frame.
+const RESULTS_PAGE_SIZE = 50;
+const RESULTS_MAX = 1000;
+const OVERSCAN_ROWS = 3;
+const RENDER_BATCH_ROWS = 2;
+const FALLBACK_IMAGE = 'data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 width=%22280%22 height=%22280%22%3E%3Crect fill=%22%23667eea%22 width=%22280%22 height=%22280%22/%3E%3Ctext fill=%22white%22 x=%2250%25%22 y=%2250%25%22 text-anchor=%22middle%22 dy=%22.3em%22 font-size=%2240%22%3E🎵%3C/text%3E%3C/svg%3E';
+
+const resultView = {
+    query: '',
+    total: 0,
+    tracks: [],
+    loadingMore: false,
+    // Aborts "load more" page fetches when the view is replaced
+    controller: new AbortController(),
+    columns: 1,
+    rowHeight: 0,
+    first: 0,
+    last: 0,
+    cards: [],
+    pool: [],
+    frame: 0
+};
+
+let currentAudio = null;
+let currentPlayBtn = null;
+let currentIndex = -1;
+
+function displayResults(tracks, total, query) {
+    const results = document.getElementById('results');
+    resultView.controller.abort();
+    resultView.cards.forEach(recycleCard);
+    results.textContent = '';
+    results.style.paddingTop = '0px';
+    results.style.paddingBottom = '0px';
+    Object.assign(resultView, {
+        query: query,
+        total: Math.min(total || tracks.length, RESULTS_MAX),
+        tracks: tracks,
+        loadingMore: false,
+        controller: new AbortController(),
+        rowHeight: 0,
+        first: 0,
+        last: 0,
+        cards: []
+    });
+    measureResults(results);
+    scheduleRender();
+}
+
+function scheduleRender() {
+    if (!resultView.frame) {
+        resultView.frame = requestAnimationFrame(renderResults);
+    }
+}
+
+function measureResults(results) {
+    const style = getComputedStyle(results);
+    resultView.columns = Math.max(style.gridTemplateColumns.split(' ').length, 1);
+    const card = resultView.cards[0];
+    if (card) {
+        resultView.rowHeight = card.offsetHeight + (parseFloat(style.rowGap) || 0);
+    }
+}
+
+function renderResults() {
+    resultView.frame = 0;
+    const results = document.getElementById('results');
+    const count = resultView.tracks.length;
+    if (!count) return;
+
+    const columns = resultView.columns;
+    const rows = Math.ceil(count / columns);
+    let first = 0;
+    let last = Math.min(RENDER_BATCH_ROWS * columns, count);
+    if (resultView.rowHeight) {
+        // Row 0 starts at the top of the grid; the padding stands in for rows above the window
+        const top = results.getBoundingClientRect().top;
+        const firstRow = Math.max(Math.floor(-top / resultView.rowHeight) - OVERSCAN_ROWS, 0);
+        const lastRow = Math.min(Math.ceil((window.innerHeight - top) / resultView.rowHeight) + OVERSCAN_ROWS, rows);
+        first = Math.min(firstRow, rows - 1) * columns;
+        last = Math.min(Math.max(lastRow, firstRow + 1) * columns, count);
+    }
+
+    // Recycle cards outside the window
+    if (last <= resultView.first || first >= resultView.last) {
+        resultView.cards.forEach(recycleCard);
+        resultView.cards = [];
+        resultView.first = resultView.last = first;
+    } else {
+        while (resultView.first < first) {
+            recycleCard(resultView.cards.shift());
+            resultView.first++;
+        }
+        while (resultView.last > last) {
+            recycleCard(resultView.cards.pop());
+            resultView.last--;
+        }
+    }
+
+    // Add up to RENDER_BATCH_ROWS rows this frame, below the window first
+    let budget = RENDER_BATCH_ROWS * columns;
+    if (resultView.last < last) {
+        const end = Math.min(last, resultView.last + budget);
+        const fragment = document.createDocumentFragment();
+        for (let i = resultView.last; i < end; i++) {
+            const card = fillCard(takeCard(), i);
+            resultView.cards.push(card);
+            fragment.appendChild(card);
+        }
+        results.appendChild(fragment);
+        budget -= end - resultView.last;
+        resultView.last = end;
+    }
+    // Keep the first rendered card at the start of a row
+    budget -= budget % columns;
+    if (resultView.first > first && budget > 0) {
+        const start = Math.max(first, resultView.first - budget);
+        const fragment = document.createDocumentFragment();
+        const cards = [];
+        for (let i = start; i < resultView.first; i++) {
+            const card = fillCard(takeCard(), i);
+            cards.push(card);
+            fragment.appendChild(card);
+        }
+        results.insertBefore(fragment, results.firstChild);
+        resultView.cards = cards.concat(resultView.cards);
+        resultView.first = start;
+    }
+
+    const measuring = !resultView.rowHeight;
+    if (measuring) {
+        measureResults(results);
+    }
+    if (resultView.rowHeight) {
+        const renderedRows = Math.ceil((resultView.last - resultView.first) / columns);
+        const rowsAbove = resultView.first / columns;
+        results.style.paddingTop = rowsAbove * resultView.rowHeight + 'px';
+        results.style.paddingBottom = Math.max(rows - rowsAbove - renderedRows, 0) * resultView.rowHeight + 'px';
+    }
+
+    // Render again once the rows can be measured, or while batches are pending
+    if ((measuring && resultView.rowHeight) || resultView.first > first || resultView.last < last) {
+        scheduleRender();
+    }
+    if (last >= count - OVERSCAN_ROWS * columns) {
+        loadMoreResults();
+    }
+}
+
+function takeCard() {
+    const pooled = resultView.pool.pop();
+    if (pooled) return pooled;
+
+    const card = document.createElement('div');
+    card.className = 'result-card';
+    card.innerHTML = `
+        <img alt="" loading="lazy" decoding="async">
+        <div class="result-info">
+            <div class="result-title"></div>
+            <div class="result-artist"></div>
+        </div>
+        <div class="audio-controls">
+            <button class="play-btn">▶️</button>
+            <div class="audio-progress">
+                <div class="audio-progress-bar"></div>
+            </div>
+            <div class="audio-time">0:00</div>
+            <div class="no-preview">No preview available</div>
+        </div>
+    `;
+    card.querySelector('img').onerror = function() {
+        if (this.src !== FALLBACK_IMAGE) this.src = FALLBACK_IMAGE;
+    };
+    observeOffscreen(card);
+    return card;
+}
+
+function fillCard(card, index) {
+    const track = resultView.tracks[index];
+    const artist = track.artist || {};
+    const album = track.album || {};
+    const img = card.querySelector('img');
+    const artistImage = artist.picture_big || artist.picture_medium || album.cover_big || FALLBACK_IMAGE;
+    if (img.getAttribute('src') !== artistImage) img.src = artistImage;
+    img.alt = artist.name || '';
+    card.querySelector('.result-title').textContent = track.title;
+    card.querySelector('.result-artist').textContent = artist.name || '';
+
+    const playBtn = card.querySelector('.play-btn');
+    const playing = index === currentIndex && currentAudio;
+    card.dataset.index = index;
+    card.classList.toggle('no-preview-card', !track.preview);
+    playBtn.disabled = false;
+    playBtn.textContent = playing && !currentAudio.paused ? '⏸️' : '▶️';
+    playBtn.classList.toggle('playing', Boolean(playing && !currentAudio.paused));
+    card.querySelector('.audio-progress-bar').id = 'progress-' + index;
+    card.querySelector('.audio-time').id = 'time-' + index;
+    if (playing) {
+        currentPlayBtn = playBtn;
+        updateProgress();
+    } else {
+        card.querySelector('.audio-progress-bar').style.width = '0%';
+        card.querySelector('.audio-time').textContent = '0:00';
+    }
+    return card;
+}
+
+function recycleCard(card) {
+    if (card.querySelector('.play-btn') === currentPlayBtn) {
+        currentPlayBtn = null;
+    }
+    card.remove();
+    resultView.pool.push(card);
+}
+
+async function loadMoreResults() {
+    const view = resultView;
+    if (view.loadingMore || view.tracks.length >= view.total) return;
+    view.loadingMore = true;
+    const seq = searchSeq;
+    try {
+        const params = new URLSearchParams({ q: view.query, index: view.tracks.length, limit: RESULTS_PAGE_SIZE });
+        const response = await fetch('/api/search?' + params, { signal: view.controller.signal });
+        if (!response.ok) return;
+        const data = await response.json();
+        if (seq !== searchSeq || view.query !== resultView.query) return;
+        if (!data.data || data.data.length === 0) {
+            view.total = view.tracks.length;
+            return;
+        }
+        view.tracks = view.tracks.concat(data.data);
+        scheduleRender();
+    } catch (err) {
+        // The next scroll retries
+    } finally {
+        view.loadingMore = false;
+    }
+}
+
+window.addEventListener('scroll', scheduleRender, { passive: true });
+window.addEventListener('resize', () => {
+    const results = document.getElementById('results');
+    const columns = resultView.columns;
+    measureResults(results);
+    if (resultView.columns !== columns) {
+        // Column count changed: the window must start on a row boundary again
+        resultView.cards.forEach(recycleCard);
+        resultView.cards = [];
+        resultView.first = resultView.last = 0;
+        resultView.rowHeight = 0;
+        results.style.paddingTop = '0px';
+    }
+    scheduleRender();
+});
+
+document.getElementById('results').addEventListener('click', (e) => {
+    const playBtn = e.target.closest('.play-btn');
+    if (!playBtn) return;
+    e.stopPropagation();
+    const index = Number(playBtn.closest('.result-card').dataset.index);
+    const track = resultView.tracks[index];
+    if (track && track.preview) {
+        toggleAudio(track.preview, playBtn, index);
+    }
+});
+
+function setPlayButton(playBtn, playing) {
+    if (!playBtn) return;
+    playBtn.textContent = playing ? '⏸️' : '▶️';
+    playBtn.classList.toggle('playing', playing);
+}
+
+function updateProgress() {
+    if (!currentAudio) return;
+    const progressBar = document.getElementById('progress-' + currentIndex);
+    const timeDisplay = document.getElementById('time-' + currentIndex);
+
+    if (progressBar) {
+        const progress = currentAudio.duration ? (currentAudio.currentTime / currentAudio.duration) * 100 : 0;
+        progressBar.style.width = progress + '%';
+    }
+
+    if (timeDisplay) {
+        const currentTime = Math.floor(currentAudio.currentTime);
+        const minutes = Math.floor(currentTime / 60);
+        const seconds = currentTime % 60;
+        timeDisplay.textContent = minutes + ':' + seconds.toString().padStart(2, '0');
+    }
+}
+
+function toggleAudio(previewUrl, playBtn, index) {
+    // If clicking the same track, toggle play/pause
+    if (currentAudio && currentIndex === index) {
+        currentPlayBtn = playBtn;
+        if (currentAudio.paused) {
+            currentAudio.play();
+            setPlayButton(playBtn, true);
+        } else {
+            currentAudio.pause();
+            setPlayButton(playBtn, false);
+        }
+        return;
+    }
+
+    // Stop current audio if playing
+    if (currentAudio) {
+        currentAudio.pause();
+        currentAudio.currentTime = 0;
+        setPlayButton(currentPlayBtn, false);
+        const progressBar = document.getElementById('progress-' + currentIndex);
+        if (progressBar) progressBar.style.width = '0%';
+    }
+
+    // Create and play new audio
+    const audio = new Audio(previewUrl);
+    currentAudio = audio;
+    currentPlayBtn = playBtn;
+    currentIndex = index;
+
+    audio.play();
+    setPlayButton(playBtn, true);
+
+    // Update progress bar and time
+    audio.addEventListener('timeupdate', () => {
+        if (audio === currentAudio) updateProgress();
+    });
+
+    // Reset when audio ends
+    audio.addEventListener('ended', () => {
+        if (audio !== currentAudio) return;
+        setPlayButton(currentPlayBtn, false);
+        const progressBar = document.getElementById('progress-' + index);
+        const timeDisplay = document.getElementById('time-' + index);
+        if (progressBar) progressBar.style.width = '0%';
+        if (timeDisplay) timeDisplay.textContent = '0:00';
+        currentAudio = null;
+        currentPlayBtn = null;
+        currentIndex = -1;
+    });
+
+    // Handle errors
+    audio.addEventListener('error', () => {
+        if (audio !== currentAudio) return;
+        if (currentPlayBtn) {
+            currentPlayBtn.textContent = '❌';
+            currentPlayBtn.classList.remove('playing');
+            currentPlayBtn.disabled = true;
+        }
+        currentAudio = null;
+        currentPlayBtn = null;
+        currentIndex = -1;
+        showError('Failed to load audio preview');
+    });
+}
+
+function showError(message) {
+    const error = document.getElementById('error');
+    const errorText = document.getElementById('errorText');
+    errorText.textContent = message;
+    error.classList.add('active');
+}
+
+// Search as you type once the input has been idle for a moment
+const liveSearch = document.getElementById('liveSearch');
+liveSearch.checked = localStorage.getItem('liveSearch') === '1';
+liveSearch.addEventListener('change', () => {
+    localStorage.setItem('liveSearch', liveSearch.checked ? '1' : '0');
+});
+document.getElementById('searchInput').addEventListener('input', function() {
+    clearTimeout(liveSearchTimer);
+    const query = this.value.trim();
+    if (!liveSearch.checked || query.length < LIVE_SEARCH_MIN_LENGTH) return;
+    liveSearchTimer = setTimeout(() => runSearch(query), LIVE_SEARCH_DELAY_MS);
+});
+
+// Offer suggestions from the local index while typing
+let suggestSeq = 0;
+let suggestController = null;
+document.getElementById('searchInput').addEventListener('input', async function() {
+    const prefix = this.value.trim();
+    const seq = ++suggestSeq;
+    const list = document.getElementById('suggestions');
+    if (suggestController) {
+        suggestController.abort();
+    }
+    if (!prefix) {
+        list.innerHTML = '';
+        return;
+    }
+    suggestController = new AbortController();
+    try {
+        const response = await fetch('/api/suggest?prefix=' + encodeURIComponent(prefix), { signal: suggestController.signal });
+        if (!response.ok || seq !== suggestSeq) return;
+        const data = await response.json();
+        list.innerHTML = '';
+        data.suggestions.forEach((suggestion) => {
+            const option = document.createElement('option');
+            option.value = suggestion.text;
+            list.appendChild(option);
+        });
+    } catch (err) {
+        // Suggestions are optional; ignore failures
+    }
+});
+
+// Close help modal when clicking outside
+document.getElementById('helpModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        toggleHelp();
+    }
+});
+
+// Close info modal when clicking outside
+document.getElementById('infoModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        toggleInfo();
+    }
+});
+
+function triggerMagic() {
+    const body = document.body;
+
+    // Phase 1: Black hole sucks everything in
+    body.classList.add('black-hole-active');
+
+    // Phase 2: After 2 seconds, remove black hole and add unicorn
+    setTimeout(() => {
+        body.classList.remove('black-hole-active');
+        body.classList.add('unicorn-return');
+    }, 2000);
+
+    // Phase 3: After 4 seconds total, remove unicorn class
+    setTimeout(() => {
+        body.classList.remove('unicorn-return');
+    }, 4000);
+}